@@ -0,0 +1,204 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import minigrid_forest_env
+
+# ==========================================
+# [설정] 벤치마크 기본 조합
+# ==========================================
+SIZES = [24, 64, 128, 256]
+FIRE_DENSITIES = [0.0, 0.05, 0.2, 0.5]  # 0.0 = 초기 화재(3개)만, 그 외 = 전체 나무 중 불타는 비율
+SPREAD_PROBS = [0.0, 0.01, 0.1]
+RATE_METRICS = ["steps_per_sec", "gen_obs_per_sec", "resets_per_sec"]  # 비교 모드에서 보는 지표 (클수록 좋음)
+
+
+# ==========================================
+# [벤치마크] ForestFireEnv 처리량 / 리셋 지연 / 할당량 측정
+# ==========================================
+def ignite_fraction(env, density, rng):
+    """건강한 나무 중 일부를 더 점화해서 전체 나무의 density 비율이 불타도록 맞춥니다."""
+    env = env.unwrapped
+    target = int(round(density * len(env.trees)))
+    missing = target - env._count_fires()
+    if missing <= 0:
+        return
+    healthy = np.flatnonzero(env.state[env._tree_x, env._tree_y] == minigrid_forest_env.HEALTHY)
+    env._set_tree_state(rng.choice(healthy, min(missing, healthy.size), replace=False).tolist(),
+                        minigrid_forest_env.BURNING)
+
+
+def bench_steps(env, n_steps, rng, density=0.0):
+    """무작위 행동으로 n_steps 진행하고 초당 스텝 수를 돌려줍니다. (에피소드 종료 시 리셋 포함)"""
+    actions = rng.integers(0, env.action_space.n, size=n_steps).tolist()
+    env.reset()
+    ignite_fraction(env, density, rng)
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+            ignite_fraction(env, density, rng)
+    elapsed = time.perf_counter() - start
+    return n_steps / elapsed
+
+
+def bench_reset(env, n_resets):
+    """reset() 한 번에 걸리는 시간(마이크로초)의 평균/중앙값/p99"""
+    samples = np.empty(n_resets)
+    for i in range(n_resets):
+        start = time.perf_counter()
+        env.reset()
+        samples[i] = time.perf_counter() - start
+    samples *= 1e6
+    return {
+        "mean_us": float(samples.mean()),
+        "p50_us": float(np.percentile(samples, 50)),
+        "p99_us": float(np.percentile(samples, 99)),
+    }
+
+
+def bench_gen_obs(env, n_calls, rng, density=0.0):
+    """현재 화재 밀도에서 gen_obs() 초당 호출 수"""
+    env.reset()
+    ignite_fraction(env, density, rng)
+    gen_obs = env.unwrapped.gen_obs
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        gen_obs()
+    return n_calls / (time.perf_counter() - start)
+
+
+def bench_allocations(env, n_steps, rng, density=0.0):
+    """tracemalloc으로 step() 구간의 스텝당 할당 피크와 남는 메모리(바이트)를 잽니다."""
+    actions = rng.integers(0, env.action_space.n, size=n_steps).tolist()
+    env.reset()
+    ignite_fraction(env, density, rng)
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        peak_sum = 0
+        for action in actions:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            _, _, terminated, truncated, _ = env.step(action)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_sum += peak - before
+            if terminated or truncated:
+                env.reset()
+                ignite_fraction(env, density, rng)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes_per_step": peak_sum / n_steps,
+        "retained_bytes_per_step": (current - base) / n_steps,
+    }
+
+
+def run_case(size, density, spread_prob, args):
+    rng = np.random.default_rng(args.seed)
+    env = minigrid_forest_env.ForestFireEnv(size=size, fire_spread_prob=spread_prob, event_skip=args.event_skip,
+                                            obs_mode=args.obs_mode)
+    env.reset(seed=args.seed)
+    ignite_fraction(env, density, rng)
+
+    result = {
+        "name": f"size={size},density={density},spread={spread_prob}" + (",event_skip" if args.event_skip else "")
+                + (f",obs={args.obs_mode}" if args.obs_mode != "vector" else ""),
+        "size": size,
+        "fire_density": density,
+        "fire_spread_prob": spread_prob,
+        "n_trees": len(env.trees),
+        "n_fires": env._count_fires(),
+        # 처리량은 --repeats번 측정해 가장 좋은 값(잡음이 가장 적은 실행)을 씁니다.
+        "steps_per_sec": max(bench_steps(env, args.steps, rng, density) for _ in range(args.repeats)),
+        "gen_obs_per_sec": max(bench_gen_obs(env, args.obs_calls, rng, density) for _ in range(args.repeats)),
+    }
+    reset = min((bench_reset(env, args.resets) for _ in range(args.repeats)), key=lambda r: r["mean_us"])
+    result["resets_per_sec"] = 1e6 / reset["mean_us"]
+    result["reset"] = reset
+    if args.allocs:
+        result["allocations"] = bench_allocations(env, args.alloc_steps, rng, density)
+    env.close()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """기준 결과 대비 처리량이 threshold 비율 이상 떨어진 항목 목록을 돌려줍니다."""
+    base_by_name = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        base = base_by_name.get(r["name"])
+        if base is None:
+            continue
+        for metric in RATE_METRICS:
+            if metric not in r or metric not in base:
+                continue
+            ratio = r[metric] / base[metric]
+            mark = "REGRESSION" if ratio < 1.0 - threshold else "ok"
+            print(f"[Compare] {r['name']:<36} {metric:<16} {base[metric]:>12,.0f} -> {r[metric]:>12,.0f} ({ratio:6.2f}x) {mark}")
+            if mark != "ok":
+                regressions.append((r["name"], metric, ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ForestFireEnv micro-benchmark suite")
+    parser.add_argument("--steps", type=int, default=2000, help="조합마다 측정할 step() 수")
+    parser.add_argument("--resets", type=int, default=500)
+    parser.add_argument("--obs-calls", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3, help="측정 반복 횟수 (처리량은 최댓값, reset 지연은 평균이 가장 작은 실행 사용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=FIRE_DENSITIES)
+    parser.add_argument("--spread-probs", type=float, nargs="+", default=SPREAD_PROBS)
+    parser.add_argument("--event-skip", action="store_true", help="사건 건너뛰기 확산 모드로 측정")
+    parser.add_argument("--obs-mode", choices=["vector", "grid"], default="vector", help="측정할 관측 형식")
+    parser.add_argument("--allocs", action="store_true", help="tracemalloc으로 스텝당 할당량도 측정 (느림)")
+    parser.add_argument("--alloc-steps", type=int, default=200)
+    parser.add_argument("--out", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--compare", help="비교할 기준 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.10, help="허용하는 처리량 하락 비율 (기본 10%%)")
+    args = parser.parse_args()
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    results = []
+    for size in args.sizes:
+        for density in args.densities:
+            for spread_prob in args.spread_probs:
+                r = run_case(size, density, spread_prob, args)
+                results.append(r)
+                line = (f"[Bench] {r['name']:<36} fires {r['n_fires']:>5} | step {r['steps_per_sec']:>9,.0f}/s"
+                        f" | gen_obs {r['gen_obs_per_sec']:>9,.0f}/s | reset p50 {r['reset']['p50_us']:7.1f}us")
+                if "allocations" in r:
+                    line += f" | alloc peak {r['allocations']['peak_bytes_per_step']:,.0f}B/step"
+                print(line)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Info] Benchmark results saved at: {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"[Warning] {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("[Info] No regressions")
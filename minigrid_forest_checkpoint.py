@@ -0,0 +1,166 @@
+import copy
+import glob
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import recursive_getattr, save_to_zip_file
+
+# ==========================================
+# [체크포인트] 파일 이름 규칙
+# ==========================================
+CKPT_PATTERN = re.compile(r"ckpt_(\d+)\.zip$")
+BEST_NAME = "best.zip"
+BEST_META = "best.json"
+
+
+def checkpoint_path(save_dir, timesteps):
+    return os.path.join(save_dir, f"ckpt_{timesteps:012d}.zip")
+
+
+def list_checkpoints(save_dir):
+    """(누적 스텝, 경로) 목록을 스텝 순으로 돌려줍니다. (best.zip 제외)"""
+    found = []
+    for path in glob.glob(os.path.join(save_dir, "ckpt_*.zip")):
+        m = CKPT_PATTERN.search(os.path.basename(path))
+        if m:
+            found.append((int(m.group(1)), path))
+    return sorted(found)
+
+
+def latest_checkpoint(save_dir):
+    """가장 최근 체크포인트 경로 (없으면 None). PPO.load(path, env=env)로 이어서 학습할 수 있습니다."""
+    found = list_checkpoints(save_dir)
+    return found[-1][1] if found else None
+
+
+def snapshot_model(model):
+    """
+    model.save()가 저장하는 내용(속성, 정책/옵티마이저 state_dict, 누적 스텝 등)을 깊은 복사로 떼어 냅니다.
+    학습 스레드에서 호출하며, 이후 모델이 바뀌어도 스냅샷은 그대로입니다.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dict_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dict_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+
+    pytorch_variables = None
+    if torch_variable_names:
+        pytorch_variables = {name: copy.deepcopy(recursive_getattr(model, name)) for name in torch_variable_names}
+    return copy.deepcopy(data), copy.deepcopy(model.get_parameters()), pytorch_variables
+
+
+# ==========================================
+# [콜백] 주기적 비동기 저장
+# ==========================================
+class AsyncCheckpointCallback(BaseCallback):
+    """
+    save_freq 스텝마다 모델 스냅샷을 학습 스레드에서 뜬 뒤, 직렬화/압축/파일 쓰기는 백그라운드 스레드 하나가 순서대로 처리합니다.
+    - 최근 keep_last개 체크포인트(ckpt_<스텝>.zip)만 남기고 오래된 것은 지웁니다.
+    - 최근 에피소드 평균 보상(ep_info_buffer)이 가장 좋았던 시점은 best.zip / best.json으로 따로 보관합니다.
+    파일은 임시 이름으로 쓴 뒤 교체하므로, 저장 도중 중단되어도 마지막 완성본은 남습니다.
+    resume=False(새 학습)이면 save_dir에 남은 이전 학습의 체크포인트와 best 파일을 previous_<시각>/ 폴더로 옮겨,
+    이어서 학습할 때 다른 학습의 체크포인트를 불러오거나 이전 best 기록과 비교하는 일이 없게 합니다.
+    정리(keep_last)는 이번 계보(이어 받은 체크포인트 + 이번에 쓴 체크포인트)에만 적용됩니다.
+    """
+
+    def __init__(self, save_dir, save_freq=1000000, keep_last=3, resume=False, verbose=0):
+        super().__init__(verbose)
+        self.save_dir = save_dir
+        self.save_freq = save_freq
+        self.keep_last = keep_last
+        self.resume = resume
+        self.best_reward = -np.inf
+        self._lineage = []
+        self._last_save = None
+        self._executor = None
+        self._pending = []
+
+    def _on_training_start(self):
+        os.makedirs(self.save_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        if self._last_save is None:
+            self._last_save = self.num_timesteps
+            if self.resume:
+                self._lineage = [path for _, path in list_checkpoints(self.save_dir)]
+                meta_path = os.path.join(self.save_dir, BEST_META)
+                if os.path.exists(meta_path):
+                    with open(meta_path) as f:
+                        self.best_reward = json.load(f)["mean_reward"]
+            else:
+                self._archive_previous_run()
+
+    def _archive_previous_run(self):
+        # 이전 학습의 파일을 하위 폴더로 옮깁니다. (list_checkpoints는 하위 폴더를 보지 않습니다)
+        old = [path for _, path in list_checkpoints(self.save_dir)]
+        old += [p for p in (os.path.join(self.save_dir, BEST_NAME), os.path.join(self.save_dir, BEST_META)) if os.path.exists(p)]
+        if not old:
+            return
+        archive = os.path.join(self.save_dir, time.strftime("previous_%Y%m%d-%H%M%S"))
+        os.makedirs(archive, exist_ok=True)
+        for path in old:
+            os.replace(path, os.path.join(archive, os.path.basename(path)))
+        print(f"[Info] Moved {len(old)} files of a previous run to: {archive}")
+
+    def _on_rollout_start(self):
+        # 롤아웃 시작 시점에는 직전 롤아웃까지의 학습(train)이 모두 반영되어 있으므로,
+        # 여기서 저장하면 누적 스텝과 정책/옵티마이저 상태가 정확히 맞습니다.
+        if self.num_timesteps - self._last_save >= self.save_freq:
+            self._last_save = self.num_timesteps
+            self.save_async()
+
+    def _on_step(self):
+        return True
+
+    def save_async(self):
+        timesteps = self.num_timesteps
+        snapshot = snapshot_model(self.model)
+        rewards = [info["r"] for info in self.model.ep_info_buffer]
+        mean_reward = float(np.mean(rewards)) if rewards else None
+        is_best = mean_reward is not None and mean_reward > self.best_reward
+        if is_best:
+            self.best_reward = mean_reward
+        # 앞선 저장에서 난 예외는 여기서 다시 올려 학습이 조용히 체크포인트 없이 진행되지 않게 합니다.
+        for future in [f for f in self._pending if f.done()]:
+            future.result()
+            self._pending.remove(future)
+        self._pending.append(self._executor.submit(self._write, timesteps, snapshot, mean_reward, is_best))
+
+    def _write(self, timesteps, snapshot, mean_reward, is_best):
+        data, params, pytorch_variables = snapshot
+        path = checkpoint_path(self.save_dir, timesteps)
+        tmp = path + ".tmp"
+        save_to_zip_file(tmp, data=data, params=params, pytorch_variables=pytorch_variables)
+        os.replace(tmp, path)
+
+        if is_best:
+            best_tmp = os.path.join(self.save_dir, BEST_NAME + ".tmp")
+            shutil.copyfile(path, best_tmp)
+            os.replace(best_tmp, os.path.join(self.save_dir, BEST_NAME))
+            with open(os.path.join(self.save_dir, BEST_META), "w") as f:
+                json.dump({"timesteps": timesteps, "mean_reward": mean_reward}, f)
+
+        if path not in self._lineage:
+            self._lineage.append(path)
+        for old in self._lineage[:-self.keep_last or None]:
+            if os.path.exists(old):
+                os.remove(old)
+        self._lineage = self._lineage[-self.keep_last:] if self.keep_last else []
+        if self.verbose:
+            print(f"[Info] Checkpoint saved at: {path}" + (" (best)" if is_best else ""))
+
+    def _on_training_end(self):
+        # 마지막 학습까지 반영된 상태를 저장하고, 대기 중인 저장이 모두 끝날 때까지 기다립니다.
+        self._last_save = self.num_timesteps
+        self.save_async()
+        self._executor.shutdown(wait=True)
+        for future in self._pending:
+            future.result()
+        self._pending = []
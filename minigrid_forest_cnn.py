@@ -0,0 +1,39 @@
+import torch
+from torch import nn
+from stable_baselines3.common.torch_layers import BaseFeaturesExtractor
+
+from minigrid_forest_core import GRID_PLANES
+
+
+# ==========================================
+# [특징 추출기] grid 관측용 작은 CNN
+# ==========================================
+class ForestGridCNN(BaseFeaturesExtractor):
+    """
+    obs_mode="grid" 관측 (C, W, H)용 CNN입니다. SB3 기본 NatureCNN은 8x8/stride 4 합성곱으로 시작해
+    24x24 격자에서는 세 번째 층에 닿기 전에 공간 크기가 1이 되므로, 3x3 합성곱만 써서 해상도를 천천히 줄입니다.
+    평면마다 값 범위가 다르므로(0/1, water, battery) 입력을 observation_space.high로 나눠 0~1로 맞춥니다.
+    사용: PPO("CnnPolicy", env, policy_kwargs={"features_extractor_class": ForestGridCNN})
+    """
+
+    def __init__(self, observation_space, features_dim=256):
+        super().__init__(observation_space, features_dim)
+        n_planes = observation_space.shape[0]
+        self.register_buffer("scale", torch.as_tensor(1.0 / observation_space.high, dtype=torch.float32))
+        if n_planes != len(GRID_PLANES):
+            raise ValueError(f"ForestGridCNN expects {len(GRID_PLANES)} planes, got observation shape {observation_space.shape}")
+        self.cnn = nn.Sequential(
+            nn.Conv2d(n_planes, 32, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.Conv2d(32, 64, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.Conv2d(64, 64, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.Flatten(),
+        )
+        with torch.no_grad():
+            n_flatten = self.cnn(torch.zeros((1,) + observation_space.shape)).shape[1]
+        self.linear = nn.Sequential(nn.Linear(n_flatten, features_dim), nn.ReLU())
+
+    def forward(self, observations):
+        return self.linear(self.cnn(observations * self.scale))
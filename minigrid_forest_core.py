@@ -0,0 +1,616 @@
+import time
+import numpy as np
+
+from minigrid_forest_index import FireIndex
+from minigrid_forest_scenario import ScenarioBank
+from minigrid_forest_layout import (
+    ForestLayout, WALL, TANK, STONE, HEALTHY, BURNING, BURNT, EXTINGUISHED, NEIGHBORS_8,
+    default_stone_coords, default_tank_pos, battery_limit
+)
+
+# --- Profiling ---
+# 프로파일링 단계 이름 -> 측정할 메서드. "step"은 단계 전체를 포함한 step() 총 시간입니다.
+PROFILE_PHASES = {
+    "step": "step",
+    "forced_return": "_forced_return_action",
+    "move_extinguish": "_move_agent",
+    "spread": "_spread_fire_logic",
+    "count_fires": "_count_fires",
+    "count_healthy": "_count_healthy",
+    "gen_obs": "gen_obs",
+    "risk_score": "_get_risk_score",
+}
+
+def _timed(method, record):
+    # record = [누적 시간(초), 호출 수]
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record[0] += time.perf_counter() - start
+            record[1] += 1
+    return wrapper
+
+# --- Episode Outcomes ---
+# 에피소드가 끝날 때 info["outcome"]에 붙는 결과 이름입니다. 로그 / 녹화 파일에는 이 튜플의 인덱스(OUTCOME_CODE)로 저장합니다.
+OUTCOMES = ("success", "timeout", "failure")
+OUTCOME_CODE = {name: i for i, name in enumerate(OUTCOMES)}
+
+# --- Grid Observation ---
+# obs_mode="grid" 관측은 (평면, x, y) uint8 배열입니다. 상태 배열과 같은 (x, y) 축 순서를 쓰며,
+# water 평면은 0..max_water, battery 평면은 남은 배터리(강제 귀환까지의 스텝)를 0..255로 환산한 값, 나머지는 0/1입니다.
+GRID_PLANES = ("healthy", "burning", "burnt", "obstacle", "agent", "water", "battery")
+OBS_MODES = ("vector", "grid")
+
+# --- Simulator ---
+class ForestFireSim:
+    """
+    산불 진압 시뮬레이터의 핵심 동역학입니다. NumPy만 사용하며 MiniGrid / Gymnasium 없이 바로 쓸 수 있습니다.
+    reset()/step()은 Gymnasium과 같은 값을 돌려주고, ForestFireEnv는 여기에 MiniGrid 렌더링과 공간 정의를 얹은 어댑터입니다.
+    """
+
+    OBS_DIM = 10
+    N_ACTIONS = 5
+
+    def __init__(self, size=24, max_steps=1000,
+                 fire_spread_prob=0.01,
+                 burn_out_prob=0.001,
+                 
+                 # [보상 설정]
+                 reward_extinguish_base=2.0,   
+                 reward_risk_factor=3.0,       
+                 # [수정] 고정 완료 보상 대신 나무 1그루당 생존 보상 설정
+                 reward_per_surviving_tree=5.0, 
+                 
+                 penalty_step=-0.01,           
+                 penalty_wall=-0.1,            
+                 penalty_spread=-1.0,          
+                 penalty_burnt=-0.5,
+                 penalty_failure=-100.0,
+                 map_seed=None,
+                 event_skip=False,
+                 macro_return=False,
+                 gamma=0.99,
+                 scenario_bank=None,
+                 scenario_mode=None,
+                 scenario_offset=0,
+                 scenario_stride=1,
+                 obs_mode="vector",
+                 profile=False
+                 ):
+        
+        self.size = size
+        self.width = self.height = size
+        self.base_spread_prob = fire_spread_prob
+        self.burn_out_prob = burn_out_prob
+        # 시나리오가 에피소드별 확률을 정하면 위 두 값이 바뀌므로, 생성자 값은 따로 보관합니다.
+        self.default_spread_prob = fire_spread_prob
+        self.default_burn_out_prob = burn_out_prob
+        
+        # 보상 변수 매핑
+        self.r_ext_base = reward_extinguish_base
+        self.r_risk_factor = reward_risk_factor
+        self.r_per_tree = reward_per_surviving_tree # 변수 저장
+        
+        self.p_step = penalty_step
+        self.p_wall = penalty_wall
+        self.p_spread = penalty_spread
+        self.p_burnt = penalty_burnt
+        self.p_failure = penalty_failure
+        
+        self.max_water = 2
+        self.current_water = 2
+        # 탱크 위치와 배터리(강제 귀환까지의 스텝 수)는 숲과 함께 size에 비례합니다. (24x24에서 (1, 1), 50)
+        self.tank_pos = default_tank_pos(size)
+        self.battery_limit = battery_limit(size)
+        self.steps_since_tank = 0
+        self.initial_fire_count = 3
+        
+        # 바위, 숲 모양, 구역 경계는 size에 비례해 커집니다. (24x24에서는 기존 맵과 동일)
+        # map_seed를 주면 그 시드로 만든 절차적 숲을 사용합니다.
+        self.map_seed = map_seed
+        self.fixed_stone_coords = default_stone_coords(size)
+
+        # 맵 구성(나무 좌표, 구역, 이웃 테이블)은 같은 설정의 환경/프로세스끼리 공유합니다.
+        self.layout = ForestLayout.get(size, self.fixed_stone_coords, self.tank_pos, map_seed=map_seed)
+        self.fixed_tree_coords = self.layout.tree_coords
+        nearest = self.layout.nearest_tree_distance()
+        if nearest is not None and nearest >= self.battery_limit:
+            raise ValueError(
+                f"No tree is reachable on size={size}, map_seed={map_seed}: the nearest tree is {nearest} steps "
+                f"from the tank at {self.tank_pos}, but the battery lasts {self.battery_limit} steps"
+            )
+
+        # [배열 엔진] 숲 상태와 나무별 좌표/구역 테이블
+        self.state = np.zeros((size, size), dtype=np.uint8)
+        self._tree_x = self.layout.tree_x
+        self._tree_y = self.layout.tree_y
+        self._tree_zone = self.layout.tree_zone
+        self._zone_total = self.layout.zone_total
+        self._tree_cell = self.layout.tree_cell
+        self._tree_id = self.layout.tree_id
+        self._off8 = [dx * size + dy for dx, dy in NEIGHBORS_8]
+        self._flat = self.state.reshape(-1)
+        self._tree_id_flat = self._tree_id.reshape(-1)
+
+        # [증분 카운터] 셀 상태가 바뀔 때만 갱신 (_set_tree_state)
+        self._burning = set()
+        self._zone_healthy = [0, 0, 0]
+        self._healthy_count = 0
+
+        # [위험도 맵] 셀별 8-이웃 건강한 나무 수와, 위험도(0~8)별 화재 버킷
+        self._risk = np.zeros((size, size), dtype=np.uint8)
+        self._risk_flat = self._risk.reshape(-1)
+        self._risk_buckets = [set() for _ in range(len(NEIGHBORS_8) + 1)]
+
+        # [공간 인덱스] 최근접 화재 질의용
+        self._fire_index = FireIndex(self._tree_x, self._tree_y)
+        self._profile = None
+
+        # [사건 건너뛰기] 켜면 다음 점화/전소까지 남은 조용한 스텝 수를 한 번에 뽑아 그동안 확산 계산을 생략합니다.
+        # 화재 배치가 바뀌면(_set_tree_state) None으로 되돌려 다시 뽑습니다.
+        self.event_skip = event_skip
+        self._quiet_steps = None
+
+        # [매크로 귀환] 켜면 강제 귀환 구간을 step() 한 번 안에서 끝까지 진행하고, 보상은 gamma로 할인해 합칩니다.
+        self.macro_return = macro_return
+        self.gamma = gamma
+
+        # [시나리오 뱅크] 미리 만든 초기 조건. reset(options={"scenario": ...})로 고르거나 scenario_mode로 매 리셋마다 사용합니다.
+        # - 정수: 그 번호의 시나리오
+        # - "stream": scenario_offset부터 scenario_stride 간격으로 차례로 (여러 환경이 겹치지 않게 나눠 읽기)
+        # - "random": np_random으로 무작위 추출, scenario_difficulty=(min, max)가 있으면 그 난이도 범위 안에서만
+        self.scenarios = None
+        if scenario_bank is not None:
+            self.scenarios = ScenarioBank.get(scenario_bank)
+            self.scenarios.check(self.layout)
+        elif scenario_mode is not None:
+            raise ValueError("scenario_mode requires scenario_bank")
+        self.scenario_mode = scenario_mode
+        self.scenario_difficulty = None
+        self.scenario_index = None
+        self._scenario_cursor = scenario_offset
+        self.scenario_stride = scenario_stride
+
+        # [관측 모드] "vector": 10차원 요약 벡터 (기본), "grid": CNN 정책용 평면 스택 (GRID_PLANES 참고)
+        if obs_mode not in OBS_MODES:
+            raise ValueError(f"obs_mode must be one of {OBS_MODES}, got {obs_mode!r}")
+        self.obs_mode = obs_mode
+        # 벽/바위는 바뀌지 않으므로 obstacle 평면은 레이아웃에서 한 번만 만듭니다.
+        self._obstacle_plane = np.isin(self.layout.initial_state, (WALL, STONE))
+
+        self.max_steps = max_steps
+        self.step_count = 0
+        self.agent_pos = self.tank_pos
+        self.agent_dir = 0
+        self.trees = list(self.fixed_tree_coords)
+        self.np_random = np.random.default_rng()
+
+        # [프로파일링] step() 단계별 시간 측정 (기본 꺼짐)
+        if profile:
+            self.enable_profiling()
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        self._reset_state(self._select_scenario(options))
+        return self.gen_obs(), self._reset_info()
+
+    def _select_scenario(self, options=None):
+        # 이번 에피소드에 쓸 시나리오 번호 (None이면 기존처럼 np_random으로 초기 화재를 뽑습니다)
+        choice = (options or {}).get("scenario", self.scenario_mode)
+        if choice is None:
+            return None
+        if self.scenarios is None:
+            raise ValueError("Selecting a scenario requires scenario_bank")
+        if choice == "stream":
+            index = self._scenario_cursor % len(self.scenarios)
+            self._scenario_cursor += self.scenario_stride
+            return index
+        if choice == "random":
+            difficulty = (options or {}).get("difficulty", self.scenario_difficulty)
+            return self.scenarios.sample(self.np_random, difficulty)
+        return int(choice)
+
+    def _reset_info(self):
+        return {} if self.scenario_index is None else {"scenario": self.scenario_index}
+
+    def _reset_state(self, scenario=None):
+        # [스냅샷 리셋] 화재 없는 초기 상태와 위험도 맵을 통째로 복사한 뒤, 초기 화재만 점화합니다.
+        self._restore_snapshot()
+        self.trees = list(self.fixed_tree_coords)
+        self.base_spread_prob = self.default_spread_prob
+        self.burn_out_prob = self.default_burn_out_prob
+        self.scenario_index = scenario
+
+        if scenario is not None:
+            # 시나리오 뱅크의 초기 화재와 (있으면) 에피소드별 확산/전소 확률을 그대로 사용합니다.
+            record = self.scenarios.records[scenario]
+            if not np.isnan(record["spread_prob"]):
+                self.base_spread_prob = float(record["spread_prob"])
+            if not np.isnan(record["burn_out_prob"]):
+                self.burn_out_prob = float(record["burn_out_prob"])
+            self._set_tree_state(self.scenarios.fires(scenario).tolist(), BURNING)
+        elif len(self.trees) >= self.initial_fire_count:
+            # reset(seed=...)로 시드된 환경 전용 Generator(self.np_random)로 초기 화재 위치를 뽑습니다.
+            fire_indices = self.np_random.choice(len(self.trees), self.initial_fire_count, replace=False)
+            self._set_tree_state(fire_indices.tolist(), BURNING)
+
+        self.agent_pos = self.tank_pos
+        self.agent_dir = 0
+        self.current_water = self.max_water
+        self.steps_since_tank = 0
+        self.step_count = 0
+
+    def _restore_snapshot(self):
+        self.state[:] = self.layout.initial_state
+        self._risk[:] = self.layout.initial_risk
+        self._burning.clear()
+        for bucket in self._risk_buckets:
+            bucket.clear()
+        self._fire_index.clear()
+        self._zone_healthy = self._zone_total.tolist()
+        self._healthy_count = len(self.fixed_tree_coords)
+        self._quiet_steps = None
+
+    def _sync_counters(self):
+        # 상태 배열 전체로부터 화재 집합/구역 카운터/위험도 맵을 다시 계산합니다. (상태를 직접 수정한 경우)
+        tree_states = self.state[self._tree_x, self._tree_y]
+        self._burning = set(np.flatnonzero(tree_states == BURNING).tolist())
+        healthy = tree_states == HEALTHY
+        self._zone_healthy = np.bincount(self._tree_zone, weights=healthy, minlength=3).astype(int).tolist()
+        self._healthy_count = int(np.count_nonzero(healthy))
+        self._risk[:] = self._risk_map()
+        self._risk_buckets = [set() for _ in range(len(NEIGHBORS_8) + 1)]
+        self._fire_index.clear()
+        for i in self._burning:
+            self._risk_buckets[self._risk_flat[self._tree_cell[i]]].add(i)
+            self._fire_index.add(i)
+        self._quiet_steps = None
+
+    def _set_tree_state(self, tree_ids, new_state):
+        # 나무 상태를 바꾸면서 화재 집합/구역 카운터/위험도 맵을 함께 갱신합니다. (점화, 전소, 진압)
+        for i in tree_ids:
+            cell = self._tree_cell[i]
+            old_state = self._flat[cell]
+            if old_state == new_state:
+                continue
+            if old_state == HEALTHY:
+                self._zone_healthy[self._tree_zone[i]] -= 1
+                self._healthy_count -= 1
+                self._shift_risk(cell, -1)
+            elif old_state == BURNING:
+                self._burning.discard(i)
+                self._risk_buckets[self._risk_flat[cell]].discard(i)
+                self._fire_index.remove(i)
+            if new_state == HEALTHY:
+                self._zone_healthy[self._tree_zone[i]] += 1
+                self._healthy_count += 1
+                self._shift_risk(cell, 1)
+            elif new_state == BURNING:
+                self._burning.add(i)
+                self._risk_buckets[self._risk_flat[cell]].add(i)
+                self._fire_index.add(i)
+            self._flat[cell] = new_state
+        self._quiet_steps = None
+
+    def _shift_risk(self, cell, delta):
+        # 건강한 나무가 생기거나 사라질 때 8-이웃의 위험도를 갱신하고, 이웃 화재의 버킷을 옮깁니다.
+        # 나무는 외벽 안쪽에만 있으므로 이웃 셀은 항상 격자 안에 있습니다.
+        for off in self._off8:
+            c = cell + off
+            risk = int(self._risk_flat[c])
+            self._risk_flat[c] = risk + delta
+            if self._flat[c] == BURNING:
+                j = self._tree_id_flat[c]
+                self._risk_buckets[risk].discard(j)
+                self._risk_buckets[risk + delta].add(j)
+
+    def _highest_risk_fire(self):
+        # 위험도가 가장 높은 버킷에서 self.trees 순서가 가장 앞선 화재 (없으면 None)
+        for bucket in reversed(self._risk_buckets):
+            if bucket:
+                return min(bucket)
+        return None
+
+    def _spread_fire_logic(self):
+        if not self._burning:
+            return 0.0
+        if self.event_skip and self._quiet_steps:
+            # 다음 사건 전의 조용한 스텝: 이웃 조회와 난수 추출 없이 넘어갑니다.
+            self._quiet_steps -= 1
+            return 0.0
+
+        # set 순회 순서에 결과가 좌우되지 않도록 나무 번호 순으로 정렬합니다.
+        fires = np.sort(np.fromiter(self._burning, dtype=np.intp, count=len(self._burning)))
+
+        # 화재의 4-이웃 중 건강한 나무를 모아 셀별 인접 화재 수(k)를 세고, 한 번에 1-(1-p)^k 확률로 점화
+        neighbors = self.layout.neighbors4[fires].ravel()
+        neighbors = neighbors[self._flat[neighbors] == HEALTHY]
+        cand, exposure = np.unique(neighbors, return_counts=True)
+
+        ignite_prob = 1.0 - (1.0 - self.base_spread_prob) ** exposure
+        if self.event_skip:
+            if self._quiet_steps is None:
+                # 화재 배치가 바뀐 뒤 첫 스텝: 이번 스텝부터 다음 사건까지의 조용한 스텝 수를 뽑습니다.
+                quiet = self._sample_quiet_steps(int(exposure.sum()), fires.size)
+                if quiet > 0:
+                    self._quiet_steps = quiet - 1
+                    return 0.0
+            draws = self._event_draws(ignite_prob, fires.size)
+        else:
+            # 이번 스텝의 점화/전소 시행을 환경 전용 Generator에서 한 번에 뽑습니다.
+            draws = self.np_random.random(cand.size + fires.size)
+        ignited = cand[draws[:cand.size] < ignite_prob]
+        burnt = fires[draws[cand.size:] < self.burn_out_prob]
+
+        self._set_tree_state(self._tree_id_flat[ignited].tolist(), BURNING)
+        self._set_tree_state(burnt.tolist(), BURNT)
+
+        spread_penalty = ignited.size * self.p_spread
+        burnt_penalty = burnt.size * self.p_burnt
+        return spread_penalty + burnt_penalty
+
+    def _sample_quiet_steps(self, exposure, n_fires):
+        # 한 스텝 동안 아무 일도 없을 확률 q = (1-p)^E * (1-b)^F (E: 화재-건강한 나무 인접 쌍 수, F: 화재 수)
+        # 다음 사건까지의 조용한 스텝 수 ~ 기하분포 P(T=t) = q^t (1-q). 역변환으로 한 번에 뽑습니다.
+        with np.errstate(divide="ignore"):
+            log_q = exposure * np.log1p(-self.base_spread_prob) + n_fires * np.log1p(-self.burn_out_prob)
+        if log_q == 0.0:
+            return np.inf  # 일어날 수 있는 사건이 없음 (p = b = 0 이거나 번질 곳이 없고 b = 0)
+        if log_q == -np.inf:
+            return 0
+        u = 1.0 - self.np_random.random()  # (0, 1]
+        return int(np.log(u) // log_q)
+
+    def _event_draws(self, ignite_prob, n_fires):
+        # 사건이 적어도 하나 있는 스텝의 시행 결과를 조건부로 뽑습니다. (점화 후보들, 화재들 순)
+        # 첫 성공 시행 j를 P(J=j | 성공 >= 1)에서 역변환으로 뽑고, j 이전은 실패, j 이후는 평소처럼 독립적으로 뽑습니다.
+        prob = np.concatenate([ignite_prob, np.full(n_fires, self.burn_out_prob)])
+        with np.errstate(divide="ignore"):
+            log_fail = np.cumsum(np.log1p(-prob))
+        u = 1.0 - self.np_random.random()  # (0, 1]
+        # P(J <= j | 성공 >= 1) = (1 - exp(log_fail[j])) / (1 - exp(log_fail[-1]))
+        target = -np.log1p(u * np.expm1(log_fail[-1]))
+        j = min(int(np.searchsorted(-log_fail, target, side="left")), prob.size - 1)
+        draws = np.empty(prob.size)
+        draws[:j] = 1.0  # 실패 (확률 < 1)
+        draws[j] = -1.0  # 성공
+        draws[j + 1:] = self.np_random.random(prob.size - j - 1)
+        return draws
+
+    def _count_fires(self):
+        return len(self._burning)
+
+    def _count_healthy(self):
+        return self._healthy_count
+
+    def nearest_fires(self, k):
+        # 에이전트에서 가까운 순서로 최대 k개의 화재 좌표
+        ax, ay = self.agent_pos
+        return [self.trees[i] for _, i in self._fire_index.k_nearest(ax, ay, k)]
+
+    def fires_within(self, radius):
+        # 에이전트에서 맨해튼 거리 radius 이내의 화재 좌표 (가까운 순)
+        ax, ay = self.agent_pos
+        return [self.trees[i] for _, i in self._fire_index.within(ax, ay, radius)]
+
+    def _get_risk_score(self, x, y):
+        return float(self._risk[x, y])
+
+    def _risk_map(self):
+        # 모든 셀의 8-이웃 건강한 나무 수 (_get_risk_score의 벡터화 버전)
+        w, h = self.state.shape
+        healthy = np.pad(self.state == HEALTHY, 1).astype(np.uint8)
+        risk = np.zeros((w, h), dtype=np.uint8)
+        for dx, dy in NEIGHBORS_8:
+            risk += healthy[1 + dx:1 + dx + w, 1 + dy:1 + dy + h]
+        return risk
+
+    def _get_zone_health(self):
+        ratios = []
+        for z in range(3):
+            total = self._zone_total[z]
+            ratios.append(self._zone_healthy[z] / total if total > 0 else 1.0)
+        return ratios
+
+    def grid_obs_high(self):
+        # grid 관측의 원소별 상한 (observation_space용)
+        high = np.ones((len(GRID_PLANES), self.width, self.height), dtype=np.uint8)
+        high[GRID_PLANES.index("water")] = self.max_water
+        high[GRID_PLANES.index("battery")] = 255
+        return high
+
+    def gen_grid_obs(self, out=None):
+        """
+        상태 배열에서 grid 관측을 만듭니다. out을 주면 그 (C, W, H) uint8 버퍼에 바로 씁니다.
+        평면마다 ufunc 한 번(out= 지정)으로 채우므로 셀 단위 파이썬 루프나 중간 배열이 없습니다.
+        """
+        if out is None:
+            out = np.empty((len(GRID_PLANES), self.width, self.height), dtype=np.uint8)
+        planes = out.view(np.bool_)
+        np.equal(self.state, HEALTHY, out=planes[0])
+        np.equal(self.state, BURNING, out=planes[1])
+        np.greater_equal(self.state, BURNT, out=planes[2])  # BURNT, EXTINGUISHED (가장 큰 두 상태 값)
+        planes[3] = self._obstacle_plane
+        ax, ay = self.agent_pos
+        out[4].fill(0)
+        out[4, ax, ay] = 1
+        out[5].fill(self.current_water)
+        # 배터리가 다 되면(강제 귀환 시작) 정확히 0
+        out[6].fill(max(self.battery_limit - self.steps_since_tank, 0) * 255 // self.battery_limit)
+        return out
+
+    def gen_obs(self):
+        if self.obs_mode == "grid":
+            return self.gen_grid_obs()
+        obs = np.zeros(10, dtype=np.float32)
+        ax, ay = self.agent_pos
+        
+        obs[0] = ax / self.size
+        obs[1] = ay / self.size
+        obs[2] = self.current_water / self.max_water
+        
+        # 동점이면 self.trees에서 앞선 나무 우선
+        if self._burning:
+            nearest = self._fire_index.nearest(ax, ay)
+            obs[3] = (self._tree_x[nearest] - ax) / self.size
+            obs[4] = (self._tree_y[nearest] - ay) / self.size
+
+            highest_risk = self._highest_risk_fire()
+            obs[5] = (self._tree_x[highest_risk] - ax) / self.size
+            obs[6] = (self._tree_y[highest_risk] - ay) / self.size
+            
+        z_ratios = self._get_zone_health()
+        obs[7] = z_ratios[0]
+        obs[8] = z_ratios[1]
+        obs[9] = z_ratios[2]
+        return obs
+
+    def _must_return(self):
+        # 물이 없거나 탱크를 떠난 지 오래되면 정책의 행동과 관계없이 탱크로 돌아가야 합니다.
+        return self.current_water == 0 or self.steps_since_tank >= self.battery_limit
+
+    def _forced_return_action(self, action):
+        # 강제 귀환 중이면 정책의 행동 대신 탱크 쪽으로 한 칸 이동
+        if self._must_return():
+            tx, ty = self.tank_pos
+            ax, ay = self.agent_pos
+            if ax < tx: action = 2
+            elif ax > tx: action = 4
+            elif ay < ty: action = 3
+            elif ay > ty: action = 1
+            else: action = 0 
+        return action
+
+    def _move_agent(self, action):
+        # 이동 / 진압 / 물 보충을 처리하고 이번 이동으로 생긴 보상을 돌려줍니다.
+        reward = 0.0
+        dx, dy = 0, 0
+        if action == 1: dy = -1
+        elif action == 2: dx = 1
+        elif action == 3: dy = 1
+        elif action == 4: dx = -1
+        
+        nx, ny = self.agent_pos[0] + dx, self.agent_pos[1] + dy
+        
+        if 0 <= nx < self.size and 0 <= ny < self.size:
+            cell_at_dest = self.state[nx, ny]
+            if cell_at_dest == BURNING:
+                if self.current_water > 0:
+                    self.current_water -= 1
+                    self._set_tree_state([self._tree_id[nx, ny]], EXTINGUISHED)
+                    self.agent_pos = (nx, ny)
+                    
+                    risk_score = self._get_risk_score(nx, ny)
+                    reward += self.r_ext_base + (risk_score * self.r_risk_factor)
+                else:
+                    self.agent_pos = (nx, ny)
+            elif cell_at_dest == WALL:
+                reward += self.p_wall 
+            else:
+                self.agent_pos = (nx, ny)
+        else:
+            reward += self.p_wall 
+
+        if self.state[self.agent_pos] == TANK:
+            if self.current_water < self.max_water:
+                self.current_water = self.max_water
+            self.steps_since_tank = 0
+        return reward
+
+    def _advance(self, action):
+        # 한 스텝의 동역학(이동/진압/확산/종료 판정)만 진행합니다. 관측은 만들지 않습니다.
+        self.step_count += 1        
+        self.steps_since_tank += 1
+        reward = self.p_step 
+        terminated = False
+        truncated = False
+        
+        action = self._forced_return_action(action)
+        reward += self._move_agent(action)
+        
+        reward += self._spread_fire_logic()
+
+        fire_count = self._count_fires()
+        healthy_count = self._count_healthy()
+
+        # 1. 실패: 전멸
+        if healthy_count == 0:
+            reward = self.p_failure
+            terminated = True
+            
+        # 2. 성공: 불 모두 진압
+        elif fire_count == 0:
+            # [수정] 성공 보상 = (남은 건강한 나무 수) * (설정된 계수, 기본 5)
+            # 예: 나무가 100그루 남았다면 +500점
+            reward += healthy_count * self.r_per_tree
+            terminated = True
+        
+        if self.step_count >= self.max_steps:
+            truncated = True
+        return reward, terminated, truncated, healthy_count
+
+    def step(self, action):
+        reward, terminated, truncated, healthy_count = self._advance(action)
+
+        info = {}
+        if self.macro_return:
+            # 정책이 고를 수 없는 강제 귀환 스텝은 관측 없이 이어서 진행하고, k번째 스텝 보상에 gamma^k를 곱해 더합니다.
+            # info["macro_steps"]는 이번 호출에서 진행한 실제 스텝 수입니다. (부트스트랩 할인 gamma^k 계산용)
+            macro_steps, discount = 1, 1.0
+            while not (terminated or truncated) and self._must_return():
+                discount *= self.gamma
+                sub_reward, terminated, truncated, healthy_count = self._advance(0)
+                reward += discount * sub_reward
+                macro_steps += 1
+            info["macro_steps"] = macro_steps
+
+        obs = self.gen_obs()
+        if terminated or truncated:
+            # 에피소드 결과 요약 (평가 / 로그용)
+            if not terminated: info["outcome"] = "timeout"
+            elif healthy_count == 0: info["outcome"] = "failure"
+            else: info["outcome"] = "success"
+            info["healthy_trees"] = healthy_count
+            info["zone_health"] = self._get_zone_health()
+            if self.scenario_index is not None:
+                info["scenario"] = self.scenario_index
+            if self._profile is not None:
+                info["profile"] = self.get_profile()
+        return obs, reward, terminated, truncated, info
+
+    # --- Profiling ---
+    def enable_profiling(self, enabled=True):
+        """
+        step()의 단계별 누적 시간과 호출 수를 기록합니다. (PROFILE_PHASES)
+        켜면 해당 메서드를 인스턴스 속성의 타이머 래퍼로 덮어쓰고, 끄면 래퍼를 지워 원래 메서드로 돌아가므로
+        꺼져 있을 때는 추가 비용이 없습니다.
+        """
+        for name in PROFILE_PHASES.values():
+            self.__dict__.pop(name, None)
+        self._profile = None
+        if not enabled:
+            return
+        self._profile = {phase: [0.0, 0] for phase in PROFILE_PHASES}
+        for phase, name in PROFILE_PHASES.items():
+            setattr(self, name, _timed(getattr(self, name), self._profile[phase]))
+
+    def reset_profile(self):
+        if self._profile is not None:
+            for record in self._profile.values():
+                record[0], record[1] = 0.0, 0
+
+    def get_profile(self):
+        """단계별 {"time_s", "calls", "mean_us"} (프로파일링이 꺼져 있으면 빈 dict)"""
+        if self._profile is None:
+            return {}
+        return {
+            phase: {
+                "time_s": total,
+                "calls": calls,
+                "mean_us": total / calls * 1e6 if calls else 0.0,
+            }
+            for phase, (total, calls) in self._profile.items()
+        }
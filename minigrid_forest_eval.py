@@ -0,0 +1,152 @@
+import argparse
+import csv
+import json
+import os
+import time
+import numpy as np
+from stable_baselines3 import PPO
+
+from minigrid_forest_core import OUTCOMES
+from minigrid_forest_parallel import make_parallel_vec_env
+
+# ==========================================
+# [설정] 경로 및 파라미터
+# ==========================================
+BASE_PATH = os.environ.get("FOREST_BASE_PATH", os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_PATH, "ppo_forest_fire_v22_ver5")  # .zip 제외하고 경로 지정
+
+
+# ==========================================
+# [평가] 배치 환경에서 에피소드 수집
+# ==========================================
+def evaluate(model, env, n_episodes, deterministic=True):
+    """
+    VecEnv 전체에 대해 model.predict를 한 번에 호출하며 에피소드 n_episodes개를 모읍니다.
+    짧은 에피소드가 많이 뽑히는 편향을 막기 위해 환경마다 같은 개수(할당량)만 집계합니다.
+    시나리오 뱅크를 stream 모드로 쓰면 환경 i가 i, i+n, ... 번을 맡으므로 정확히 0..n_episodes-1번이 평가됩니다.
+    반환값: 에피소드별 dict 목록 (reward, length, outcome, healthy_trees, zone_health, scenario)
+    """
+    n_envs = env.num_envs
+    quota = np.array([(n_episodes - i + n_envs - 1) // n_envs for i in range(n_envs)])
+    counts = np.zeros(n_envs, dtype=int)
+    returns = np.zeros(n_envs)
+    lengths = np.zeros(n_envs, dtype=int)
+    episodes = []
+
+    obs = env.reset()
+    while (counts < quota).any():
+        actions, _ = model.predict(obs, deterministic=deterministic)
+        obs, rewards, dones, infos = env.step(actions)
+        returns += rewards
+        lengths += 1
+        for i in np.flatnonzero(dones).tolist():
+            if counts[i] < quota[i]:
+                info = infos[i]
+                episodes.append({
+                    "reward": float(returns[i]),
+                    "length": int(lengths[i]),
+                    "outcome": info["outcome"],
+                    "healthy_trees": info["healthy_trees"],
+                    "zone_health": info["zone_health"],
+                    "scenario": info.get("scenario", -1),
+                })
+                counts[i] += 1
+            returns[i] = 0.0
+            lengths[i] = 0
+    return episodes
+
+
+def summarize(episodes):
+    """에피소드 목록을 결과 비율 / 보상 분포 / 길이 / 생존 나무 / 구역별 건강도 통계로 요약합니다."""
+    n = len(episodes)
+    rewards = np.array([e["reward"] for e in episodes])
+    lengths = np.array([e["length"] for e in episodes])
+    healthy = np.array([e["healthy_trees"] for e in episodes])
+    zones = np.array([e["zone_health"] for e in episodes])
+    outcomes = [e["outcome"] for e in episodes]
+
+    def dist(x):
+        p5, p25, p50, p75, p95 = np.percentile(x, [5, 25, 50, 75, 95])
+        return {
+            "mean": float(x.mean()), "std": float(x.std()), "min": float(x.min()),
+            "p5": float(p5), "p25": float(p25), "p50": float(p50), "p75": float(p75), "p95": float(p95),
+            "max": float(x.max()),
+        }
+
+    rates = {}
+    for outcome in OUTCOMES:
+        rate = outcomes.count(outcome) / n
+        # 정규 근사 95% 신뢰구간 반폭
+        rates[outcome] = {"rate": rate, "ci95": float(1.96 * np.sqrt(rate * (1 - rate) / n))}
+
+    return {
+        "episodes": n,
+        "outcomes": rates,
+        "reward": dist(rewards),
+        "length": dist(lengths),
+        "healthy_trees": dist(healthy),
+        "zone_health": {zone: float(zones[:, i].mean()) for i, zone in enumerate("ABC")},
+    }
+
+
+# ==========================================
+# [메인] 헤드리스 일괄 평가
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ForestFire headless batch evaluation")
+    parser.add_argument("--model", default=MODEL_PATH, help=".zip 제외한 모델 경로")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--n-workers", type=int, default=1, help="환경을 돌릴 워커 프로세스 수")
+    parser.add_argument("--envs-per-worker", type=int, default=64, help="워커 하나가 맡는 환경 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stochastic", action="store_true", help="정책을 확률적으로 샘플링 (기본: deterministic)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--scenarios", help="시나리오 뱅크 경로 (0번부터 차례로 평가해 모델끼리 같은 초기 조건으로 비교)")
+    parser.add_argument("--out", help="요약(JSON)을 저장할 경로")
+    parser.add_argument("--episodes-out", help="에피소드별 결과(CSV)를 저장할 경로 (시나리오 번호 포함)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model + ".zip"):
+        print(f"[Error] Model file not found at: {args.model}.zip")
+        exit()
+
+    print(f"Loading Model from: {args.model}")
+    model = PPO.load(args.model, device=args.device)
+    env_kwargs = {"scenario_bank": args.scenarios, "scenario_mode": "stream"} if args.scenarios else {}
+    if len(model.observation_space.shape) == 3:
+        env_kwargs["obs_mode"] = "grid"  # CnnPolicy로 학습한 모델은 grid 관측으로 평가
+    env = make_parallel_vec_env(n_workers=args.n_workers, envs_per_worker=args.envs_per_worker, seed=args.seed,
+                                env_kwargs=env_kwargs or None)
+    env.seed(args.seed)
+
+    start = time.perf_counter()
+    episodes = evaluate(model, env, args.episodes, deterministic=not args.stochastic)
+    elapsed = time.perf_counter() - start
+    env.close()
+
+    summary = summarize(episodes)
+    summary["model"] = args.model
+    summary["seed"] = args.seed
+    summary["scenarios"] = args.scenarios
+    summary["elapsed_s"] = elapsed
+
+    rates = summary["outcomes"]
+    print(f"[Eval] {summary['episodes']} episodes in {elapsed:.1f}s ({env.num_envs} envs)")
+    print("[Eval] " + " | ".join(f"{k} {v['rate']:.1%} ±{v['ci95']:.1%}" for k, v in rates.items()))
+    print(f"[Eval] reward mean {summary['reward']['mean']:.2f} (p5 {summary['reward']['p5']:.2f}, "
+          f"p50 {summary['reward']['p50']:.2f}, p95 {summary['reward']['p95']:.2f})")
+    print(f"[Eval] length mean {summary['length']['mean']:.1f} | surviving trees mean {summary['healthy_trees']['mean']:.1f}")
+    print("[Eval] zone health " + " | ".join(f"{z} {r:.1%}" for z, r in summary["zone_health"].items()))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"[Info] Evaluation summary saved at: {args.out}")
+
+    if args.episodes_out:
+        with open(args.episodes_out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scenario", "reward", "length", "outcome", "healthy_trees", "zone_a", "zone_b", "zone_c"])
+            for e in sorted(episodes, key=lambda e: e["scenario"]):
+                writer.writerow([e["scenario"], e["reward"], e["length"], e["outcome"], e["healthy_trees"], *e["zone_health"]])
+        print(f"[Info] Per-episode results saved at: {args.episodes_out}")
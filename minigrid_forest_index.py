@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# --- Spatial Index ---
+class FireIndex:
+    """
+    불타는 나무의 좌표를 빽빽한(dense) 배열에 모아 두는 증분 공간 인덱스입니다.
+    나무 번호(self.trees 순서)로 O(1) 추가/삭제(마지막 칸과 교체)하고,
+    맨해튼 거리 기준 최근접 / k-최근접 / 반경 질의를 화재 수에 비례하는 벡터 연산 한 번으로 처리합니다.
+    질의 비용은 맵 크기와 무관하며, 거리가 같으면 나무 번호가 작은 쪽이 먼저 나옵니다.
+    """
+
+    def __init__(self, xs, ys):
+        self.tree_x = np.asarray(xs, dtype=np.intp)
+        self.tree_y = np.asarray(ys, dtype=np.intp)
+        n = len(self.tree_x)
+        self.n_trees = n
+        self.ids = np.zeros(n, dtype=np.intp)
+        self.xs = np.zeros(n, dtype=np.intp)
+        self.ys = np.zeros(n, dtype=np.intp)
+        self.slot = np.full(n, -1, dtype=np.intp)
+        self.count = 0
+
+    def clear(self):
+        self.slot[self.ids[:self.count]] = -1
+        self.count = 0
+
+    def add(self, i):
+        if self.slot[i] >= 0:
+            return
+        k = self.count
+        self.ids[k] = i
+        self.xs[k] = self.tree_x[i]
+        self.ys[k] = self.tree_y[i]
+        self.slot[i] = k
+        self.count = k + 1
+
+    def remove(self, i):
+        k = self.slot[i]
+        if k < 0:
+            return
+        last = self.count - 1
+        if k != last:
+            j = self.ids[last]
+            self.ids[k] = j
+            self.xs[k] = self.xs[last]
+            self.ys[k] = self.ys[last]
+            self.slot[j] = k
+        self.slot[i] = -1
+        self.count = last
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, i):
+        return self.slot[i] >= 0
+
+    def _keys(self, x, y):
+        # (거리, 나무 번호)를 정수 하나로 묶은 정렬 키
+        n = self.count
+        dist = np.abs(self.xs[:n] - x) + np.abs(self.ys[:n] - y)
+        return dist * self.n_trees + self.ids[:n]
+
+    def nearest(self, x, y):
+        """(x, y)에서 가장 가까운 화재의 나무 번호 (없으면 None)"""
+        if self.count == 0:
+            return None
+        return int(self._keys(x, y).min() % self.n_trees)
+
+    def k_nearest(self, x, y, k):
+        """(x, y)에서 맨해튼 거리가 가까운 순서로 최대 k개의 (거리, 나무 번호)를 돌려줍니다."""
+        if k <= 0 or self.count == 0:
+            return []
+        keys = self._keys(x, y)
+        if k < keys.size:
+            keys = np.partition(keys, k - 1)[:k]
+        keys.sort()
+        return [(int(key // self.n_trees), int(key % self.n_trees)) for key in keys]
+
+    def within(self, x, y, radius):
+        """(x, y)에서 맨해튼 거리 radius 이내의 (거리, 나무 번호) 목록 (가까운 순)"""
+        if self.count == 0:
+            return []
+        keys = self._keys(x, y)
+        keys = np.sort(keys[keys < (radius + 1) * self.n_trees])
+        return [(int(key // self.n_trees), int(key % self.n_trees)) for key in keys]
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+# --- Cell States ---
+# 숲 상태는 (width, height) uint8 배열에 [x, y] 순서로 저장합니다.
+EMPTY, WALL, TANK, STONE, HEALTHY, BURNING, BURNT, EXTINGUISHED = range(8)
+
+NEIGHBORS_4 = [(0,1), (0,-1), (1,0), (-1,0)]
+NEIGHBORS_8 = [(0,1), (0,-1), (1,0), (-1,0), (1,1), (1,-1), (-1,1), (-1,-1)]
+
+# 레이아웃 캐시 파일 위치 (환경 변수로 변경 가능). 같은 머신의 워커들은 이 파일을 memmap으로 공유합니다.
+CACHE_DIR = os.environ.get("FOREST_LAYOUT_CACHE", os.path.join(tempfile.gettempdir(), "forest_layout_cache"))
+LAYOUT_VERSION = 2
+
+# --- Map Parameters ---
+# 원래 맵은 24x24 기준으로 설계되었고, 다른 크기에서는 아래 값을 size / BASE_SIZE 비율로 늘립니다.
+BASE_SIZE = 24
+BASE_ELLIPSES = [
+    (11, 19, 7, 3.5),    # 아래쪽 넓은 영역 (중심 x, 중심 y, 반지름 x, 반지름 y)
+    (18, 11, 3.5, 7),    # 오른쪽 위로 뻗는 영역
+    (16, 16, 3.5, 3.5),  # 연결부 보정
+]
+BASE_STONE_BLOCKS = [(15, 18), (18, 15), (13, 15)]  # 2x2 바위 블록의 왼쪽 위 좌표
+BASE_ZONE_SPLIT = 14  # 구역 경계 (x, y 공통)
+BASE_TANK_POS = (1, 1)  # 물탱크 위치
+BASE_BATTERY = 50       # 탱크를 떠난 뒤 강제 귀환이 시작되는 스텝 수 (배터리)
+
+_LAYOUT_CACHE = {}
+
+
+# --- Static Map Layout ---
+class ForestLayout:
+    """
+    맵의 정적인 구성(외벽, 물탱크, 바위, 나무 좌표, 구역)을 한 번만 계산해 두는 객체입니다.
+    (size, 바위 집합, 탱크 위치)를 키로 프로세스 안에서 메모이즈하고,
+    배열들은 .npy 파일로 저장해 다른 프로세스가 np.load(mmap_mode='r')로 같은 페이지를 공유합니다.
+    모든 배열은 읽기 전용이며, 환경은 필요한 것만 복사해서 사용합니다.
+
+    - tree_x, tree_y: 나무 좌표 (self.trees 순서)
+    - tree_zone: 나무별 구역 (0=A, 1=B, 2=C)
+    - tree_cell / tree_id: 나무 번호 <-> 펼친 셀 인덱스(x * size + y)
+    - neighbors4 / neighbors8: 나무별 4/8-이웃 셀 인덱스
+    - initial_state: 화재가 없는 초기 상태 배열, initial_risk: 그 상태의 위험도 맵
+    """
+
+    ARRAYS = ("tree_x", "tree_y", "tree_zone", "tree_cell", "tree_id",
+              "neighbors4", "neighbors8", "initial_state", "initial_risk")
+
+    def __init__(self, size, stone_coords, tank_pos, arrays, map_seed=None):
+        self.size = size
+        self.stone_coords = list(stone_coords)
+        self.tank_pos = tank_pos
+        self.map_seed = map_seed
+        self.zone_split = zone_split(size)
+        for name in self.ARRAYS:
+            # memmap 서브클래스 대신 같은 버퍼를 보는 ndarray 뷰로 둡니다. (인덱싱 오버헤드 감소)
+            setattr(self, name, np.asarray(arrays[name]))
+        self.tree_coords = list(zip(self.tree_x.tolist(), self.tree_y.tolist()))
+        self.zone_total = np.bincount(self.tree_zone, minlength=3)
+
+    def nearest_tree_distance(self):
+        # 탱크에서 가장 가까운 나무까지의 맨해튼 거리 (바위는 지나갈 수 있으므로 최단 경로와 같음)
+        if len(self.tree_x) == 0:
+            return None
+        tx, ty = self.tank_pos
+        return int((np.abs(self.tree_x - tx) + np.abs(self.tree_y - ty)).min())
+
+    @classmethod
+    def get(cls, size=24, stone_coords=(), tank_pos=(1, 1), cache_dir=None, map_seed=None):
+        # map_seed가 None이면 기본 숲 모양(크기에 비례해 확대), 정수면 그 시드로 만든 절차적 숲입니다.
+        stones = tuple(sorted(tuple(c) for c in stone_coords))
+        key = (size, stones, tuple(tank_pos), map_seed)
+        layout = _LAYOUT_CACHE.get(key)
+        if layout is None:
+            arrays = _load_or_build(key, cache_dir or CACHE_DIR)
+            layout = cls(size, stone_coords, tuple(tank_pos), arrays, map_seed)
+            _LAYOUT_CACHE[key] = layout
+        return layout
+
+
+def zone_split(size):
+    # 구역 경계 좌표 (24x24에서 14)
+    return int(round(BASE_ZONE_SPLIT * size / BASE_SIZE))
+
+
+def default_tank_pos(size):
+    # 물탱크도 숲과 같은 비율로 옮깁니다. (24x24에서는 (1, 1), 외벽 안쪽으로 제한)
+    return tuple(min(max(1, int(round(c * size / BASE_SIZE))), size - 2) for c in BASE_TANK_POS)
+
+
+def battery_limit(size):
+    # 배터리도 숲까지의 거리와 같은 비율로 늘립니다. (24x24에서는 50스텝)
+    return int(round(BASE_BATTERY * size / BASE_SIZE))
+
+
+def zone_of(x, y, split=BASE_ZONE_SPLIT):
+    if x < split and y > split: return 0  # Zone A
+    elif x >= split and y >= split: return 1  # Zone B
+    else: return 2  # Zone C
+
+
+def default_stone_coords(size):
+    # 기본 바위 블록 3개를 맵 크기에 맞춰 옮기고 키웁니다. (24x24에서는 기존 12칸과 같음)
+    scale = size / BASE_SIZE
+    side = max(2, int(round(2 * scale)))
+    coords = []
+    for bx, by in BASE_STONE_BLOCKS:
+        x0, y0 = int(round(bx * scale)), int(round(by * scale))
+        coords.extend((x0 + dx, y0 + dy) for dy in range(side) for dx in range(side))
+    return coords
+
+
+def procedural_ellipses(size, seed):
+    # 시드로 타원 3~5개를 이어 붙인 숲 모양을 만듭니다. 각 타원은 앞 타원과 겹치도록 놓여 숲이 한 덩어리가 됩니다.
+    rng = np.random.default_rng(seed)
+    ellipses = []
+    cx, cy = rng.uniform(0.35, 0.65, size=2) * size
+    for _ in range(int(rng.integers(3, 6))):
+        rx, ry = rng.uniform(0.12, 0.3, size=2) * size
+        ellipses.append((cx, cy, rx, ry))
+        angle = rng.uniform(0, 2 * np.pi)
+        cx = float(np.clip(cx + np.cos(angle) * rx, 0.2 * size, 0.8 * size))
+        cy = float(np.clip(cy + np.sin(angle) * ry, 0.2 * size, 0.8 * size))
+    return ellipses
+
+
+def generate_organic_forest(size, tank_pos, map_seed=None):
+    # 타원 여러 개를 합친 숲 모양. 순서는 기존 set 기반 구현과 같도록 x-우선 순회로 넣습니다.
+    if map_seed is None:
+        scale = size / BASE_SIZE
+        ellipses = [(cx * scale, cy * scale, rx * scale, ry * scale) for cx, cy, rx, ry in BASE_ELLIPSES]
+    else:
+        ellipses = procedural_ellipses(size, map_seed)
+
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    coords = set()
+    for cx, cy, rx, ry in ellipses:
+        cx_, cy_ = np.nonzero(((xs - cx) / rx)**2 + ((ys - cy) / ry)**2 <= 1)
+        coords.update(zip(cx_.tolist(), cy_.tolist()))
+
+    valid_coords = []
+    for (x, y) in coords:
+        if 2 <= x < size - 2 and 2 <= y < size - 2:
+            if (x, y) != tank_pos:
+                valid_coords.append((x, y))
+    return valid_coords
+
+
+def _build(size, stones, tank_pos, map_seed=None):
+    stone_set = set(stones)
+    trees = [c for c in generate_organic_forest(size, tank_pos, map_seed) if c not in stone_set]
+    n = len(trees)
+
+    tree_x = np.array([c[0] for c in trees], dtype=np.intp)
+    tree_y = np.array([c[1] for c in trees], dtype=np.intp)
+    split = zone_split(size)
+    tree_zone = np.array([zone_of(x, y, split) for (x, y) in trees], dtype=np.intp)
+    tree_cell = tree_x * size + tree_y
+    tree_id = np.full((size, size), -1, dtype=np.intp)
+    tree_id[tree_x, tree_y] = np.arange(n)
+
+    off4 = np.array([dx * size + dy for dx, dy in NEIGHBORS_4], dtype=np.intp)
+    off8 = np.array([dx * size + dy for dx, dy in NEIGHBORS_8], dtype=np.intp)
+
+    state = np.zeros((size, size), dtype=np.uint8)
+    state[[0, size - 1], :] = WALL
+    state[:, [0, size - 1]] = WALL
+    state[tank_pos] = TANK
+    for (sx, sy) in stones:
+        if 0 < sx < size - 1 and 0 < sy < size - 1:
+            state[sx, sy] = STONE
+    state[tree_x, tree_y] = HEALTHY
+
+    healthy = np.pad(state == HEALTHY, 1).astype(np.uint8)
+    risk = np.zeros((size, size), dtype=np.uint8)
+    for dx, dy in NEIGHBORS_8:
+        risk += healthy[1 + dx:1 + dx + size, 1 + dy:1 + dy + size]
+
+    return {
+        "tree_x": tree_x,
+        "tree_y": tree_y,
+        "tree_zone": tree_zone,
+        "tree_cell": tree_cell,
+        "tree_id": tree_id,
+        "neighbors4": tree_cell[:, None] + off4,
+        "neighbors8": tree_cell[:, None] + off8,
+        "initial_state": state,
+        "initial_risk": risk,
+    }
+
+
+def _load_or_build(key, cache_dir):
+    size, stones, tank_pos, map_seed = key
+    # 생성기 상수도 해시에 넣어, 값을 고치고 LAYOUT_VERSION을 올리지 않아도 이전 캐시를 재사용하지 않게 합니다.
+    generator = (BASE_SIZE, BASE_ELLIPSES, BASE_STONE_BLOCKS, BASE_ZONE_SPLIT)
+    digest = hashlib.sha1(repr((LAYOUT_VERSION, generator) + key).encode()).hexdigest()[:16]
+    prefix = os.path.join(cache_dir, f"layout_{size}_{digest}")
+    paths = {name: f"{prefix}_{name}.npy" for name in ForestLayout.ARRAYS}
+
+    if all(os.path.exists(p) for p in paths.values()):
+        try:
+            return {name: np.load(p, mmap_mode='r') for name, p in paths.items()}
+        except (OSError, ValueError):
+            pass  # 다른 프로세스가 쓰는 중이거나 손상된 파일이면 다시 만듭니다.
+
+    arrays = _build(size, stones, tank_pos, map_seed)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, p in paths.items():
+            # 임시 파일에 쓴 뒤 교체해서, 동시에 읽는 워커가 반쯤 쓰인 파일을 보지 않게 합니다.
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, arrays[name])
+            os.replace(tmp, p)
+        return {name: np.load(p, mmap_mode='r') for name, p in paths.items()}
+    except OSError:
+        # 캐시 디렉터리를 쓸 수 없으면 메모리 배열을 그대로 사용합니다.
+        for a in arrays.values():
+            a.setflags(write=False)
+        return arrays
@@ -0,0 +1,215 @@
+import os
+import time
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+from minigrid_forest_core import OUTCOMES, OUTCOME_CODE
+from minigrid_forest_records import open_records, open_for_append
+
+# ==========================================
+# [설정] 에피소드 로그 형식
+# ==========================================
+# 파일 = 16바이트 헤더 + 고정 크기 레코드의 연속 (추가 전용, 형식은 minigrid_forest_records 참고)
+LOG_MAGIC = b"FFEPLOG1"
+EPISODE_DTYPE = np.dtype([
+    ("timestep", "<i8"),    # 에피소드가 끝난 시점의 누적 학습 스텝
+    ("time", "<f4"),        # 로그 시작 후 경과 시간(초)
+    ("reward", "<f4"),
+    ("length", "<i4"),
+    ("healthy", "<i4"),     # 살아남은 나무 수
+    ("zone", "<f4", (3,)),  # 구역별 건강한 나무 비율 (A, B, C)
+    ("outcome", "u1"),      # OUTCOMES의 인덱스 (모르면 255)
+])
+
+
+# ==========================================
+# [쓰기] 청크 단위 추가 기록
+# ==========================================
+class EpisodeLogWriter:
+    """
+    에피소드 요약을 메모리 버퍼에 모았다가 chunk_size개마다 파일 끝에 한 번에 씁니다.
+    파일은 추가 전용이라 학습 도중에도 다른 프로세스가 EpisodeLogReader로 읽을 수 있습니다.
+    기존 로그에 이어 쓸 때는(append=True, --resume) 중단으로 잘린 마지막 레코드를 먼저 잘라내 레코드 경계를 맞추고,
+    append=False이면 이전 기록을 지우고 헤더만 남깁니다.
+    """
+
+    def __init__(self, path, chunk_size=256, append=True):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open_for_append(path, LOG_MAGIC, EPISODE_DTYPE, keep=None if append else 0, kind="an episode log")
+        self._buffer = np.zeros(chunk_size, dtype=EPISODE_DTYPE)
+        self._count = 0
+        self._t_start = time.time()
+
+    def append(self, timestep, reward, length, outcome=None, healthy=-1, zone=(np.nan, np.nan, np.nan)):
+        record = self._buffer[self._count]
+        record["timestep"] = timestep
+        record["time"] = time.time() - self._t_start
+        record["reward"] = reward
+        record["length"] = length
+        record["healthy"] = healthy
+        record["zone"] = zone
+        record["outcome"] = OUTCOME_CODE.get(outcome, 255)
+        self._count += 1
+        if self._count == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self._file.flush()
+            self._count = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+# ==========================================
+# [읽기] memmap 리더와 증분 집계
+# ==========================================
+class EpisodeLogReader:
+    """
+    로그 파일을 memmap으로 열어 지난번 이후 새로 추가된 레코드만 돌려줍니다. (read_new)
+    파일 전체를 파싱하지 않으므로 로그가 커져도 한 번에 읽는 양은 새 레코드 수에 비례합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+
+    def read_all(self):
+        return open_records(self.path, LOG_MAGIC, EPISODE_DTYPE, kind="an episode log")
+
+    def read_new(self):
+        records = self.read_all()
+        new = np.array(records[self.position:])
+        self.position = len(records)
+        return new
+
+
+class RollingCurve:
+    """
+    보상의 이동 평균 곡선을 증분으로 계산합니다.
+    최근 window개 보상만 링 버퍼에 두고, 곡선 점은 max_points를 넘으면 절반으로 솎아내 메모리를 일정하게 유지합니다.
+    """
+
+    def __init__(self, window=100, max_points=2000):
+        self.window = window
+        self.max_points = max_points
+        self._ring = np.zeros(window)
+        self._ring_sum = 0.0
+        self._seen = 0
+        self._stride = 1
+        self.timesteps = []
+        self.rewards = []
+        self.means = []
+        self.outcome_counts = np.zeros(len(OUTCOMES) + 1, dtype=np.int64)
+
+    def update(self, records):
+        codes = np.minimum(records["outcome"], len(OUTCOMES))
+        self.outcome_counts += np.bincount(codes, minlength=len(OUTCOMES) + 1)
+        for timestep, reward in zip(records["timestep"].tolist(), records["reward"].tolist()):
+            slot = self._seen % self.window
+            self._ring_sum += reward - self._ring[slot]
+            self._ring[slot] = reward
+            self._seen += 1
+            if self._seen % self._stride == 0:
+                self.timesteps.append(timestep)
+                self.rewards.append(reward)
+                self.means.append(self._ring_sum / min(self._seen, self.window))
+                if len(self.timesteps) > self.max_points:
+                    self.timesteps = self.timesteps[1::2]
+                    self.rewards = self.rewards[1::2]
+                    self.means = self.means[1::2]
+                    self._stride *= 2
+
+    def save_plot(self, save_path, title="Learning Curve"):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        if not self.timesteps:
+            return
+        plt.figure(figsize=(10, 5))
+        plt.plot(self.timesteps, self.rewards, alpha=0.3, label='Raw Reward', color='blue')
+        plt.plot(self.timesteps, self.means, label=f'Mean of last {self.window}', color='red')
+        plt.xlabel('Timesteps')
+        plt.ylabel('Episode Reward')
+        plt.title(title)
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(save_path)
+        plt.close()
+
+
+def plot_log(log_path, save_path, title="Learning Curve", window=100):
+    """로그 파일 전체로 학습 곡선을 그립니다. (memmap을 청크 단위로 읽어 메모리 사용량이 일정)"""
+    records = EpisodeLogReader(log_path).read_all()
+    curve = RollingCurve(window)
+    for start in range(0, len(records), 65536):
+        curve.update(np.array(records[start:start + 65536]))
+    curve.save_plot(save_path, title)
+    return curve
+
+
+# ==========================================
+# [콜백] 학습 중 기록 + 그래프 갱신
+# ==========================================
+class EpisodeLogCallback(BaseCallback):
+    """
+    Monitor / VecMonitor가 info["episode"]를 붙인 스텝마다 에피소드 요약을 바이너리 로그에 추가하고,
+    plot_freq 스텝마다 새 레코드만 읽어 곡선을 갱신해 그래프 파일을 다시 저장합니다.
+    resume=False이면 처음 학습을 시작할 때 기존 로그를 비워, 다른 학습의 에피소드가 곡선에 섞이지 않게 합니다.
+    """
+
+    def __init__(self, log_path, plot_path=None, plot_freq=100000, window=100, title="Learning Curve",
+                 resume=False, verbose=0):
+        super().__init__(verbose)
+        self.log_path = log_path
+        self.plot_path = plot_path
+        self.plot_freq = plot_freq
+        self.title = title
+        self.resume = resume
+        self.curve = RollingCurve(window)
+        self.writer = None
+        self.reader = None
+        self._last_plot = 0
+
+    def _on_training_start(self):
+        # 첫 learn()에서만 resume에 따라 비우고, 같은 콜백으로 learn()을 다시 호출하면 같은 파일 끝에 계속 추가합니다.
+        first = self.reader is None
+        self.writer = EpisodeLogWriter(self.log_path, append=self.resume or not first)
+        if first:
+            self.reader = EpisodeLogReader(self.log_path)
+
+    def _on_step(self):
+        for info in self.locals["infos"]:
+            episode = info.get("episode")
+            if episode is None:
+                continue
+            self.writer.append(
+                self.num_timesteps, episode["r"], episode["l"],
+                outcome=info.get("outcome"),
+                healthy=info.get("healthy_trees", -1),
+                zone=info.get("zone_health", (np.nan, np.nan, np.nan)),
+            )
+        if self.plot_path and self.num_timesteps - self._last_plot >= self.plot_freq:
+            self._last_plot = self.num_timesteps
+            self.update_plot()
+        return True
+
+    def update_plot(self):
+        self.writer.flush()
+        self.curve.update(self.reader.read_new())
+        if self.plot_path:
+            try:
+                self.curve.save_plot(self.plot_path, self.title)
+            except ImportError:
+                self.plot_path = None
+                print("[Warning] matplotlib is not installed; live reward graph disabled.")
+
+    def _on_training_end(self):
+        self.update_plot()
+        self.writer.close()
@@ -0,0 +1,68 @@
+import numpy as np
+import torch as th
+from stable_baselines3 import PPO
+from stable_baselines3.common.buffers import RolloutBuffer
+
+
+# ==========================================
+# [매크로 귀환] 전이별 할인율을 쓰는 PPO
+# ==========================================
+class MacroRolloutBuffer(RolloutBuffer):
+    """
+    전이마다 할인율이 다른 롤아웃 버퍼입니다. macro_return 환경에서 강제 귀환을 묶은 전이는 k스텝을 진행하므로
+    다음 상태 가치를 gamma 대신 gamma^k로 할인해야 합니다. (구간 안의 보상은 환경이 이미 gamma로 할인해 합쳤습니다)
+    - discounts: 전이별 할인율 (기본 gamma)
+    - bootstrap_fix: 시간 초과로 끝난 매크로 전이에서 SB3가 gamma로 더한 종료 상태 가치를 gamma^k로 고치는 보정값
+    """
+
+    def reset(self):
+        super().reset()
+        self.discounts = np.full((self.buffer_size, self.n_envs), self.gamma, dtype=np.float32)
+        self.bootstrap_fix = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+
+    def compute_returns_and_advantage(self, last_values, dones):
+        # SB3 RolloutBuffer와 같은 GAE(lambda)이며, gamma 자리에 전이별 할인율을 씁니다.
+        last_values = last_values.clone().cpu().numpy().flatten()
+        rewards = self.rewards + self.bootstrap_fix
+
+        last_gae_lam = 0
+        for step in reversed(range(self.buffer_size)):
+            if step == self.buffer_size - 1:
+                next_non_terminal = 1.0 - dones.astype(np.float32)
+                next_values = last_values
+            else:
+                next_non_terminal = 1.0 - self.episode_starts[step + 1]
+                next_values = self.values[step + 1]
+            discount = self.discounts[step]
+            delta = rewards[step] + discount * next_values * next_non_terminal - self.values[step]
+            last_gae_lam = delta + discount * self.gae_lambda * next_non_terminal * last_gae_lam
+            self.advantages[step] = last_gae_lam
+        self.returns = self.advantages + self.values
+
+
+class MacroPPO(PPO):
+    """
+    macro_return=True 환경용 PPO입니다. 환경의 gamma와 같은 값을 써야 합니다.
+    env.step 직후(버퍼에 넣기 전) info["macro_steps"]를 읽어 이번 전이의 할인율 gamma^k를 MacroRolloutBuffer에 적습니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("rollout_buffer_class", MacroRolloutBuffer)
+        super().__init__(*args, **kwargs)
+
+    def _update_info_buffer(self, infos, dones=None):
+        # collect_rollouts에서 env.step 다음, rollout_buffer.add 전에 불리므로 buffer.pos가 이번 전이의 자리입니다.
+        super()._update_info_buffer(infos, dones)
+        buffer = self.rollout_buffer
+        if not isinstance(buffer, MacroRolloutBuffer) or buffer.full:
+            return
+        for i, info in enumerate(infos):
+            k = info.get("macro_steps", 1)
+            buffer.discounts[buffer.pos, i] = self.gamma ** k
+            buffer.bootstrap_fix[buffer.pos, i] = 0.0
+            truncated = dones is not None and dones[i] and info.get("TimeLimit.truncated", False)
+            if k > 1 and truncated and info.get("terminal_observation") is not None:
+                terminal_obs = self.policy.obs_to_tensor(info["terminal_observation"])[0]
+                with th.no_grad():
+                    terminal_value = self.policy.predict_values(terminal_obs)[0].item()
+                buffer.bootstrap_fix[buffer.pos, i] = (self.gamma ** k - self.gamma) * terminal_value
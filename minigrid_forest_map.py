@@ -7,6 +7,8 @@ from minigrid.minigrid_env import MiniGridEnv
 import random
 import time
 
+from minigrid_forest_layout import ForestLayout, default_stone_coords, default_tank_pos
+
 # --- Custom Objects ---
 class HealthyTree(Box):
     def __init__(self): super().__init__(color='green')
@@ -28,21 +30,16 @@ class Stone(Box):
 
 # --- Visualization Environment ---
 class ForestFireMapViewer(MiniGridEnv):
-    def __init__(self, size=24, render_mode="human"):
+    def __init__(self, size=24, render_mode="human", map_seed=None):
         self.size = size
-        self.tank_pos = (1, 1)
+        self.tank_pos = default_tank_pos(size)
         
         # 바위 좌표 설정
-        self.fixed_stone_coords = [
-            (15, 18), (16, 18), (15, 19), (16, 19),
-            (18, 15), (19, 15), (18, 16), (19, 16),
-            (13, 15), (14, 15), (13, 16), (14, 16)
-        ]
+        self.fixed_stone_coords = default_stone_coords(size)
 
-        # 숲 좌표 생성
-        all_tree_coords = self._generate_organic_forest()
-        # 바위 위치에는 나무 생성 제외
-        self.fixed_tree_coords = [c for c in all_tree_coords if c not in self.fixed_stone_coords]
+        # 숲 좌표 생성 (학습 환경과 같은 공유 레이아웃, 바위 위치는 제외됨)
+        self.layout = ForestLayout.get(size, self.fixed_stone_coords, self.tank_pos, map_seed=map_seed)
+        self.fixed_tree_coords = self.layout.tree_coords
 
         mission_space = MissionSpace(mission_func=lambda: "Map Visualization Mode")
         
@@ -57,32 +54,6 @@ class ForestFireMapViewer(MiniGridEnv):
         # [수정] 시야 하이라이트(흰색 네모) 제거
         self.highlight = False 
 
-    # 숲 모양 생성 로직
-    def _generate_organic_forest(self):
-        coords = set()
-        # 1. 아래쪽 넓은 영역
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 11) / 7)**2 + ((y - 19) / 3.5)**2 <= 1:
-                    coords.add((x, y))
-        # 2. 오른쪽 위로 뻗는 영역
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 18) / 3.5)**2 + ((y - 11) / 7)**2 <= 1:
-                    coords.add((x, y))
-        # 3. 연결부 보정
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 16) / 3.5)**2 + ((y - 16) / 3.5)**2 <= 1:
-                     coords.add((x, y))
-
-        valid_coords = []
-        for (x, y) in coords:
-            if 2 <= x < self.size - 2 and 2 <= y < self.size - 2:
-                if (x, y) != self.tank_pos:
-                    valid_coords.append((x, y))
-        return valid_coords
-
     # 그리드 그리기
     def _gen_grid(self, width, height):
         self.grid = Grid(width, height)
@@ -91,7 +62,8 @@ class ForestFireMapViewer(MiniGridEnv):
         
         # 바위 배치
         for (sx, sy) in self.fixed_stone_coords:
-            self.grid.set(sx, sy, Stone())
+            if 0 < sx < width - 1 and 0 < sy < height - 1:
+                self.grid.set(sx, sy, Stone())
 
         self.trees = []
         # 나무 배치
@@ -7,6 +7,8 @@ from minigrid.minigrid_env import MiniGridEnv
 import random
 import time
 
+from minigrid_forest_layout import ForestLayout, default_stone_coords, default_tank_pos
+
 # --- Custom Objects ---
 # 구역별 나무 색상 다르게 설정
 class TreeZoneA(Box):
@@ -38,18 +40,14 @@ class Stone(Box):
 
 # --- Visualization Environment ---
 class ForestFireMapViewer(MiniGridEnv):
-    def __init__(self, size=24, render_mode="human"):
+    def __init__(self, size=24, render_mode="human", map_seed=None):
         self.size = size
-        self.tank_pos = (1, 1)
+        self.tank_pos = default_tank_pos(size)
         
-        self.fixed_stone_coords = [
-            (15, 18), (16, 18), (15, 19), (16, 19),
-            (18, 15), (19, 15), (18, 16), (19, 16),
-            (13, 15), (14, 15), (13, 16), (14, 16)
-        ]
+        self.fixed_stone_coords = default_stone_coords(size)
 
-        all_tree_coords = self._generate_organic_forest()
-        self.fixed_tree_coords = [c for c in all_tree_coords if c not in self.fixed_stone_coords]
+        self.layout = ForestLayout.get(size, self.fixed_stone_coords, self.tank_pos, map_seed=map_seed)
+        self.fixed_tree_coords = self.layout.tree_coords
 
         mission_space = MissionSpace(mission_func=lambda: "Zone Visualization: A(Grn) B(Yel) C(Pur)")
         
@@ -62,51 +60,24 @@ class ForestFireMapViewer(MiniGridEnv):
         )
         self.highlight = False 
 
-    def _generate_organic_forest(self):
-        coords = set()
-        # 1. 아래쪽 넓은 영역
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 11) / 7)**2 + ((y - 19) / 3.5)**2 <= 1: coords.add((x, y))
-        # 2. 오른쪽 위로 뻗는 영역
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 18) / 3.5)**2 + ((y - 11) / 7)**2 <= 1: coords.add((x, y))
-        # 3. 연결부 보정
-        for x in range(self.size):
-            for y in range(self.size):
-                if ((x - 16) / 3.5)**2 + ((y - 16) / 3.5)**2 <= 1: coords.add((x, y))
-
-        valid_coords = []
-        for (x, y) in coords:
-            if 2 <= x < self.size - 2 and 2 <= y < self.size - 2:
-                if (x, y) != self.tank_pos:
-                    valid_coords.append((x, y))
-        return valid_coords
-
     def _gen_grid(self, width, height):
         self.grid = Grid(width, height)
         self.grid.wall_rect(0, 0, width, height)
         self.put_obj(WaterTank(), *self.tank_pos)
         
         for (sx, sy) in self.fixed_stone_coords:
-            self.grid.set(sx, sy, Stone())
+            if 0 < sx < width - 1 and 0 < sy < height - 1:
+                self.grid.set(sx, sy, Stone())
 
         self.trees = []
         
         # [핵심] 좌표에 따라 다른 색상의 나무 배치
-        for (tx, ty) in self.fixed_tree_coords:
-            # 구역 판별 로직 (학습 환경과 동일)
-            # Zone A: 왼쪽 꼬리 (x < 14, y > 14)
-            # Zone B: 오른쪽 꺾임 (나머지 중 y > 14) -> 즉 x >= 14
-            # Zone C: 위쪽 머리 (y <= 14)
-            
-            if ty <= 14: # y좌표가 위쪽이면 Zone C
-                tree_obj = TreeZoneC()
-            elif tx < 14: # 아래쪽이면서 왼쪽이면 Zone A
-                tree_obj = TreeZoneA()
-            else: # 나머지(아래쪽이면서 오른쪽) Zone B
-                tree_obj = TreeZoneB()
+        for (tx, ty), zone in zip(self.fixed_tree_coords, self.layout.tree_zone.tolist()):
+            # 구역 판별은 학습 환경과 같은 레이아웃 값을 사용
+            # Zone A: 왼쪽 꼬리 (x < 경계, y > 경계), 경계는 24x24에서 14
+            # Zone B: 오른쪽 꺾임 (x >= 경계, y >= 경계)
+            # Zone C: 위쪽 머리 (나머지)
+            tree_obj = (TreeZoneA, TreeZoneB, TreeZoneC)[zone]()
 
             self.grid.set(tx, ty, tree_obj)
             self.trees.append((tx, ty))
@@ -0,0 +1,242 @@
+import multiprocessing as mp
+import os
+import numpy as np
+import gymnasium as gym
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+from minigrid_forest_vec_env import ForestFireVecEnv
+
+# 워커 프로세스가 매번 torch / SB3 / 환경 모듈을 새로 import하지 않도록, forkserver에 미리 올려 두고 fork합니다.
+WORKER_PRELOAD = ["minigrid_forest_parallel", "minigrid_forest_env"]
+
+
+# ==========================================
+# [워커] 프로세스 하나가 VecEnv 하나(환경 여러 개)를 담당
+# ==========================================
+def _shard_worker(remote, parent_remote, venv_fn_wrapper):
+    parent_remote.close()
+    venv = venv_fn_wrapper.var()
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, rewards, dones, infos = venv.step(data)
+                remote.send((obs, rewards, dones, infos, venv.reset_infos))
+            elif cmd == "reset":
+                seed, options = data
+                if seed is not None:
+                    venv.seed(seed)
+                venv.set_options(options)
+                obs = venv.reset()
+                remote.send((obs, venv.reset_infos))
+            elif cmd == "get_spaces":
+                remote.send((venv.observation_space, venv.action_space, venv.num_envs))
+            elif cmd == "get_attr":
+                remote.send(venv.get_attr(data[0], data[1]))
+            elif cmd == "set_attr":
+                remote.send(venv.set_attr(data[0], data[1], data[2]))
+            elif cmd == "env_method":
+                remote.send(venv.env_method(data[0], *data[1], indices=data[3], **data[2]))
+            elif cmd == "is_wrapped":
+                remote.send(venv.env_is_wrapped(data[0], data[1]))
+            elif cmd == "get_images":
+                remote.send(venv.get_images())
+            elif cmd == "close":
+                venv.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class ShardedSubprocVecEnv(VecEnv):
+    """
+    SubprocVecEnv처럼 워커 프로세스를 띄우되, 각 워커가 환경 하나가 아니라 VecEnv 하나(여러 환경)를 맡습니다.
+    워커 간 통신은 스텝마다 워커당 한 번뿐이므로, 배치 환경(ForestFireVecEnv)과 함께 쓰면
+    프로세스 수 x 워커당 환경 수만큼 병렬로 진행할 수 있습니다. (Box 관측 전용)
+    """
+
+    def __init__(self, venv_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+
+        start_method = _default_start_method(start_method)
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in venv_fns])
+        self.processes = []
+        for work_remote, remote, venv_fn in zip(self.work_remotes, self.remotes, venv_fns):
+            args = (work_remote, remote, CloudpickleWrapper(venv_fn))
+            process = ctx.Process(target=_shard_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        for remote in self.remotes:
+            remote.send(("get_spaces", None))
+        specs = [remote.recv() for remote in self.remotes]
+        observation_space, action_space, _ = specs[0]
+        self.shard_sizes = [n for _, _, n in specs]
+        self.shard_offsets = np.cumsum([0] + self.shard_sizes)
+
+        super().__init__(int(self.shard_offsets[-1]), observation_space, action_space)
+
+    def _split(self, values):
+        return [values[start:end] for start, end in zip(self.shard_offsets[:-1], self.shard_offsets[1:])]
+
+    def _route(self, indices):
+        # 전역 환경 번호 -> (워커, 워커 내 번호 목록)
+        routes = {}
+        for i in self._get_indices(indices):
+            shard = int(np.searchsorted(self.shard_offsets, i, side="right") - 1)
+            routes.setdefault(shard, []).append(i - int(self.shard_offsets[shard]))
+        return routes
+
+    def step_async(self, actions):
+        for remote, chunk in zip(self.remotes, self._split(np.asarray(actions))):
+            remote.send(("step", chunk))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        obs, rewards, dones, infos, reset_infos = zip(*results)
+        self.reset_infos = [info for shard in reset_infos for info in shard]
+        infos = [info for shard in infos for info in shard]
+        return np.concatenate(obs), np.concatenate(rewards), np.concatenate(dones), infos
+
+    def reset(self):
+        seeds = self._split(self._seeds)
+        options = self._split(self._options)
+        for remote, shard_seeds, shard_options in zip(self.remotes, seeds, options):
+            # 워커 VecEnv는 seed(s)로 s, s+1, ...을 쓰므로 첫 번째 값만 넘기면 전역 번호와 맞습니다.
+            remote.send(("reset", (shard_seeds[0], list(shard_options))))
+        results = [remote.recv() for remote in self.remotes]
+        obs, reset_infos = zip(*results)
+        self.reset_infos = [info for shard in reset_infos for info in shard]
+        self._reset_seeds()
+        self._reset_options()
+        return np.concatenate(obs)
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def get_images(self):
+        for remote in self.remotes:
+            remote.send(("get_images", None))
+        return [image for remote in self.remotes for image in remote.recv()]
+
+    def _gather(self, cmd, make_data, indices):
+        routes = self._route(indices)
+        for shard, local in routes.items():
+            self.remotes[shard].send((cmd, make_data(local)))
+        return [value for shard in routes for value in self.remotes[shard].recv()]
+
+    def get_attr(self, attr_name, indices=None):
+        return self._gather("get_attr", lambda local: (attr_name, local), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        routes = self._route(indices)
+        for shard, local in routes.items():
+            self.remotes[shard].send(("set_attr", (attr_name, value, local)))
+        for shard in routes:
+            self.remotes[shard].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._gather("env_method", lambda local: (method_name, method_args, method_kwargs, local), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return self._gather("is_wrapped", lambda local: (wrapper_class, local), indices)
+
+
+# ==========================================
+# [팩토리] 워커별 시드 / CPU 고정 / Monitor 로그
+# ==========================================
+def _default_start_method(start_method=None):
+    # SubprocVecEnv와 같은 기본값(forkserver, 없으면 spawn). forkserver면 워커용 모듈을 미리 불러 둡니다.
+    if start_method is None:
+        forkserver_available = "forkserver" in mp.get_all_start_methods()
+        start_method = "forkserver" if forkserver_available else "spawn"
+    if start_method == "forkserver":
+        mp.set_forkserver_preload(WORKER_PRELOAD)
+    return start_method
+
+
+def _setup_worker(rank, pin_cpus):
+    # 워커 프로세스 안에서 호출: CPU affinity 설정 (난수는 환경마다 자기 Generator를 씁니다)
+    if pin_cpus and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[rank % len(cpus)]})
+
+
+def make_env_fn(rank, seed=None, log_dir=None, pin_cpus=False, env_kwargs=None):
+    """워커 하나 = 환경 하나 (SubprocVecEnv용). Monitor 로그는 log_dir/{rank}.monitor.csv"""
+    def _init():
+        _setup_worker(rank, pin_cpus)
+        import minigrid_forest_env  # 환경 등록 (MiniGrid는 단일 환경 워커에서만 불러옵니다)
+        env = gym.make("ForestFireMLP-v22", **(env_kwargs or {}))
+        if seed is not None:
+            env.reset(seed=seed + rank)
+        if log_dir is not None:
+            env = Monitor(env, os.path.join(log_dir, str(rank)))
+        return env
+    return _init
+
+
+def make_shard_fn(rank, envs_per_worker, seed=None, log_dir=None, pin_cpus=False, env_kwargs=None):
+    """워커 하나 = 배치 환경 하나 (ShardedSubprocVecEnv용). Monitor 로그는 log_dir/worker{rank}.monitor.csv"""
+    def _init():
+        shard_seed = None if seed is None else seed + rank * envs_per_worker
+        _setup_worker(rank, pin_cpus)
+        venv = ForestFireVecEnv(envs_per_worker, seed=shard_seed, **(env_kwargs or {}))
+        if log_dir is not None:
+            venv = VecMonitor(venv, os.path.join(log_dir, f"worker{rank}"))
+        return venv
+    return _init
+
+
+def make_parallel_vec_env(n_workers=1, envs_per_worker=1, seed=None, log_dir=None,
+                          pin_cpus=False, start_method=None, env_kwargs=None):
+    """
+    n_workers x envs_per_worker개의 환경을 만드는 VecEnv.
+    - 워커 1개, 환경 1개: 기존과 같은 DummyVecEnv(Monitor(env))
+    - 워커 1개, 환경 여러 개: 같은 프로세스의 ForestFireVecEnv
+    - 워커 여러 개, 워커당 환경 1개: SubprocVecEnv
+    - 워커 여러 개, 워커당 환경 여러 개: ShardedSubprocVecEnv(워커마다 ForestFireVecEnv)
+    Monitor 로그는 워커별 파일로 남고, load_results(log_dir)가 하나의 학습 곡선으로 합칩니다.
+    pin_cpus는 별도 워커 프로세스가 있을 때만 적용합니다. (워커가 1개면 환경이 학습 프로세스 안에서 돌아 학습 전체가 고정되므로)
+    시나리오 뱅크를 쓰면 전체 환경이 뱅크를 겹치지 않게 나눠 읽도록 워커별 scenario_offset / scenario_stride를 정합니다.
+    """
+    def rank_kwargs(rank):
+        if not env_kwargs or "scenario_bank" not in env_kwargs:
+            return env_kwargs
+        kwargs = {"scenario_offset": rank * envs_per_worker, "scenario_stride": n_workers * envs_per_worker}
+        kwargs.update(env_kwargs)
+        return kwargs
+
+    if n_workers <= 1:
+        if envs_per_worker <= 1:
+            return DummyVecEnv([make_env_fn(0, seed, log_dir, False, rank_kwargs(0))])
+        return make_shard_fn(0, envs_per_worker, seed, log_dir, False, rank_kwargs(0))()
+    if envs_per_worker <= 1:
+        return SubprocVecEnv(
+            [make_env_fn(rank, seed, log_dir, pin_cpus, rank_kwargs(rank)) for rank in range(n_workers)],
+            start_method=_default_start_method(start_method),
+        )
+    return ShardedSubprocVecEnv(
+        [make_shard_fn(rank, envs_per_worker, seed, log_dir, pin_cpus, rank_kwargs(rank)) for rank in range(n_workers)],
+        start_method=start_method,
+    )
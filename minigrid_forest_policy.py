@@ -0,0 +1,106 @@
+import argparse
+import time
+import numpy as np
+
+# ==========================================
+# [정책] PyTorch 없이 동작하는 추론기
+# ==========================================
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0, out=x),
+    "identity": lambda x: x,
+}
+
+
+class NumpyPolicy:
+    """
+    export_policy()로 만든 .npz(액터 MLP 가중치)를 읽어 결정적(argmax) 행동을 계산합니다.
+    NumPy만 사용하므로 torch / stable_baselines3 없이 바로 불러올 수 있습니다.
+    관측 하나(shape (obs_dim,))를 넣으면 int, 배치(shape (N, obs_dim))를 넣으면 int 배열을 돌려줍니다.
+    """
+
+    def __init__(self, path):
+        data = np.load(path)
+        n_layers = int(data["n_layers"])
+        # x @ W 형태로 바로 곱할 수 있게 (in, out)으로 전치해 둡니다.
+        self.weights = [np.ascontiguousarray(data[f"w{i}"].T, dtype=np.float32) for i in range(n_layers)]
+        self.biases = [data[f"b{i}"].astype(np.float32) for i in range(n_layers)]
+        self.action_w = np.ascontiguousarray(data["action_w"].T, dtype=np.float32)
+        self.action_b = data["action_b"].astype(np.float32)
+        self.activation = str(data["activation"])
+        self._act = ACTIVATIONS[self.activation]
+        self.obs_dim = self.weights[0].shape[0] if n_layers else self.action_w.shape[0]
+
+    def logits(self, obs):
+        x = np.asarray(obs, dtype=np.float32)
+        for w, b in zip(self.weights, self.biases):
+            x = self._act(x @ w + b)
+        return x @ self.action_w + self.action_b
+
+    def act(self, obs):
+        logits = self.logits(obs)
+        if logits.ndim == 1:
+            return int(logits.argmax())
+        return logits.argmax(axis=1)
+
+    __call__ = act
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        # stable_baselines3의 model.predict와 같은 모양으로 호출할 수 있게 맞춘 래퍼 (항상 결정적)
+        action = self.act(obs)
+        return (np.array(action) if np.ndim(obs) == 1 else action), state
+
+
+# ==========================================
+# [내보내기] PPO zip -> npz
+# ==========================================
+def export_policy(model_path, out_path):
+    """학습된 PPO 모델에서 액터(정책망 + action_net) 가중치만 뽑아 .npz로 저장합니다. (torch 필요)"""
+    import torch.nn as nn
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = model.policy
+    layers = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)]
+    activation = {nn.Tanh: "tanh", nn.ReLU: "relu"}.get(policy.activation_fn, None)
+    if activation is None:
+        raise ValueError(f"Unsupported activation for export: {policy.activation_fn}")
+    if policy.features_extractor.__class__.__name__ != "FlattenExtractor":
+        raise ValueError("Only MlpPolicy with FlattenExtractor can be exported.")
+
+    arrays = {
+        "n_layers": np.int64(len(layers)),
+        "activation": np.array(activation if layers else "identity"),
+        "action_w": policy.action_net.weight.detach().numpy(),
+        "action_b": policy.action_net.bias.detach().numpy(),
+    }
+    for i, layer in enumerate(layers):
+        arrays[f"w{i}"] = layer.weight.detach().numpy()
+        arrays[f"b{i}"] = layer.bias.detach().numpy()
+    np.savez(out_path, **arrays)
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a PPO actor to .npz and check NumPy inference")
+    parser.add_argument("model", help=".zip 모델 경로")
+    parser.add_argument("out", help="저장할 .npz 경로")
+    parser.add_argument("--check", type=int, default=1000, help="SB3 결과와 비교할 무작위 관측 수 (0이면 생략)")
+    args = parser.parse_args()
+
+    model = export_policy(args.model, args.out)
+    print(f"[Info] Policy exported at: {args.out}")
+
+    if args.check:
+        policy = NumpyPolicy(args.out)
+        rng = np.random.default_rng(0)
+        space = model.observation_space
+        obs = rng.uniform(space.low, space.high, size=(args.check,) + space.shape).astype(np.float32)
+        expected, _ = model.predict(obs, deterministic=True)
+        match = float(np.mean(policy.act(obs) == expected))
+
+        start = time.perf_counter()
+        for o in obs:
+            policy.act(o)
+        single_us = (time.perf_counter() - start) / len(obs) * 1e6
+        print(f"[Check] action agreement with SB3: {match:.2%} | single-obs latency {single_us:.1f}us")
@@ -0,0 +1,54 @@
+import os
+import numpy as np
+
+
+# ==========================================
+# [설정] 고정 크기 레코드 파일 형식
+# ==========================================
+# 파일 = 16바이트 헤더(매직 8바이트 + 레코드 크기 8바이트) + 고정 크기 레코드의 연속 (추가 전용)
+# 에피소드 로그(minigrid_forest_log)와 녹화 파일(minigrid_forest_replay)이 같은 형식을 씁니다.
+HEADER_SIZE = 16
+
+
+def _check_header(header, magic, dtype, path, kind):
+    if header[:8] != magic or np.frombuffer(header[8:], dtype=np.int64)[0] != dtype.itemsize:
+        raise ValueError(f"Not {kind}: {path}")
+
+
+def record_count(path, dtype):
+    """헤더 뒤의 완성된 레코드 수입니다. (쓰는 중에 잘린 마지막 레코드는 세지 않습니다)"""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    return max(size - HEADER_SIZE, 0) // dtype.itemsize
+
+
+def open_records(path, magic, dtype, kind="a record file"):
+    """헤더를 확인한 뒤 완성된 레코드만 읽기 전용 memmap으로 엽니다. (쓰는 중인 파일도 읽을 수 있습니다)"""
+    if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+        with open(path, "rb") as f:
+            _check_header(f.read(HEADER_SIZE), magic, dtype, path, kind)
+    n = record_count(path, dtype)
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+
+def open_for_append(path, magic, dtype, keep=None, kind="a record file"):
+    """
+    레코드를 이어 쓸 파일을 열어 끝으로 이동한 파일 객체를 돌려줍니다.
+    파일이 없거나 헤더보다 짧으면 헤더만 쓰고, 있으면 헤더를 확인한 뒤 앞의 keep개(None이면 완성된 레코드 전부)만 남기고 잘라냅니다.
+    """
+    f = open(path, "r+b" if os.path.exists(path) else "w+b")
+    if os.path.getsize(path) < HEADER_SIZE:
+        f.truncate(0)
+        f.write(magic + np.int64(dtype.itemsize).tobytes())
+    else:
+        try:
+            _check_header(f.read(HEADER_SIZE), magic, dtype, path, kind)
+        except ValueError:
+            f.close()
+            raise
+        n = record_count(path, dtype)
+        f.truncate(HEADER_SIZE + (n if keep is None else min(keep, n)) * dtype.itemsize)
+    f.seek(0, os.SEEK_END)
+    f.flush()
+    return f
@@ -0,0 +1,459 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+from minigrid_forest_core import ForestFireSim, OUTCOMES, OUTCOME_CODE
+from minigrid_forest_layout import BURNING, BURNT, EXTINGUISHED
+from minigrid_forest_records import open_records, open_for_append
+
+# ==========================================
+# [설정] 녹화 파일 형식
+# ==========================================
+# 녹화 폴더 = meta.json(환경 설정) + 추가 전용 바이너리 파일 3개.
+# 각 파일은 16바이트 헤더 뒤에 고정 크기 레코드가 이어집니다. (형식은 minigrid_forest_records 참고)
+# 에피소드 i의 스텝/전이는 steps/events 파일에서 연속된 구간이며, 에피소드 레코드가 그 위치를 가리킵니다.
+META_NAME = "meta.json"
+
+EPISODE_DTYPE = np.dtype([
+    ("seed", "<i8"),         # reset에 쓴 시드 (없으면 -1)
+    ("step_start", "<i8"),   # steps 파일에서의 시작 위치
+    ("event_start", "<i8"),  # events 파일에서의 시작 위치
+    ("length", "<i4"),
+    ("n_initial", "<i4"),    # 리셋 때의 전이 수 (초기 화재)
+    ("n_events", "<i4"),     # 초기 화재를 포함한 전체 전이 수
+    ("reward", "<f4"),
+    ("healthy", "<i4"),
+    ("outcome", "u1"),       # OUTCOMES의 인덱스 (모르면 255)
+])
+STEP_DTYPE = np.dtype([
+    ("x", "<u2"),            # 스텝 후 에이전트 위치
+    ("y", "<u2"),
+    ("water", "u1"),         # 스텝 후 남은 물
+    ("action", "u1"),        # 정책이 고른 행동 (강제 귀환 전)
+    ("n_events", "<u4"),     # 이 스텝에서 상태가 바뀐 나무 수
+    ("reward", "<f4"),
+])
+EVENT_DTYPE = np.dtype([
+    ("tree", "<u4"),         # 나무 번호 (layout.tree_coords 순서)
+    ("state", "u1"),         # 바뀐 뒤의 셀 상태
+])
+FILES = {
+    "episodes": ("episodes.bin", b"FFRPEPI1", EPISODE_DTYPE),
+    "steps": ("steps.bin", b"FFRPSTP1", STEP_DTYPE),
+    "events": ("events.bin", b"FFRPEVT1", EVENT_DTYPE),
+}
+
+
+def sim_kwargs(sim):
+    """시뮬레이터 인스턴스에서 같은 맵/동역학/보상을 다시 만들 수 있는 생성자 인자를 모읍니다."""
+    return {
+        "size": sim.size,
+        "max_steps": sim.max_steps,
+        "fire_spread_prob": sim.default_spread_prob,
+        "burn_out_prob": sim.default_burn_out_prob,
+        "reward_extinguish_base": sim.r_ext_base,
+        "reward_risk_factor": sim.r_risk_factor,
+        "reward_per_surviving_tree": sim.r_per_tree,
+        "penalty_step": sim.p_step,
+        "penalty_wall": sim.p_wall,
+        "penalty_spread": sim.p_spread,
+        "penalty_burnt": sim.p_burnt,
+        "penalty_failure": sim.p_failure,
+        "map_seed": sim.map_seed,
+        "event_skip": sim.event_skip,
+        "obs_mode": sim.obs_mode,
+        "macro_return": sim.macro_return,
+        "gamma": sim.gamma,
+    }
+
+
+# ==========================================
+# [녹화] 셀 상태 전이만 기록
+# ==========================================
+class EpisodeRecorder:
+    """
+    시뮬레이터(ForestFireSim / ForestFireEnv / gym.make로 만든 환경)를 감싸 reset/step을 그대로 전달하면서,
+    에피소드마다 초기 화재와 스텝별 (에이전트 위치, 물, 행동, 보상, 상태가 바뀐 나무) 목록만 기록합니다.
+    전이는 _set_tree_state를 인스턴스 속성으로 덮어써 수집하므로 격자 전체를 비교하거나 복사하지 않습니다.
+    파일은 추가 전용이며, 스텝/전이를 먼저 쓰고 에피소드 레코드를 마지막에 써서 읽는 쪽은 완성된 에피소드만 봅니다.
+    """
+
+    def __init__(self, env, out_dir, flush_every=64):
+        self.env = env
+        self.sim = getattr(env, "unwrapped", env)
+        self.out_dir = out_dir
+        self.flush_every = flush_every
+        os.makedirs(out_dir, exist_ok=True)
+
+        meta = {"version": 1, "env_kwargs": sim_kwargs(self.sim)}
+        meta_path = os.path.join(out_dir, META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                existing = json.load(f)
+            if existing != meta:
+                raise ValueError(f"Replay at {out_dir} was recorded with different env settings: {existing['env_kwargs']}")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f, indent=2)
+
+        # 이어서 녹화할 때는 마지막으로 완성된 에피소드 뒤에 남은 조각(중간에 끊긴 에피소드)을 잘라 냅니다.
+        name, magic, dtype = FILES["episodes"]
+        episodes = open_records(os.path.join(out_dir, name), magic, dtype, kind="a replay file")
+        self._counts = {"episodes": len(episodes), "steps": 0, "events": 0}
+        if len(episodes):
+            last = episodes[-1]
+            self._counts["steps"] = int(last["step_start"] + last["length"])
+            self._counts["events"] = int(last["event_start"] + last["n_events"])
+        del episodes
+
+        self._files = {}
+        for key, (name, magic, dtype) in FILES.items():
+            path = os.path.join(out_dir, name)
+            self._files[key] = open_for_append(path, magic, dtype, keep=self._counts[key], kind="a replay file")
+
+        self._events = []
+        self._steps = []
+        self._seed = -1
+        self._n_initial = 0
+        self._reward = 0.0
+        self._pending = 0
+        self._hook()
+
+    def _hook(self):
+        sim = self.sim
+        original = sim._set_tree_state
+        flat, tree_cell, events = sim._flat, sim._tree_cell, self._events
+
+        def _set_tree_state(tree_ids, new_state):
+            for i in tree_ids:
+                if flat[tree_cell[i]] != new_state:
+                    events.append((i, new_state))
+            return original(tree_ids, new_state)
+
+        sim._set_tree_state = _set_tree_state
+
+    def reset(self, seed=None, options=None):
+        # 끝나지 않은 에피소드는 기록하지 않고 버립니다.
+        self._events.clear()
+        self._steps.clear()
+        self._reward = 0.0
+        obs, info = self.env.reset(seed=seed, options=options)
+        self._seed = -1 if seed is None else seed
+        self._n_initial = len(self._events)
+        return obs, info
+
+    def step(self, action):
+        n_before = len(self._events)
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        sim = self.sim
+        x, y = sim.agent_pos
+        self._steps.append((x, y, sim.current_water, int(action), len(self._events) - n_before, reward))
+        self._reward += reward
+        if terminated or truncated:
+            self._end_episode(info)
+        return obs, reward, terminated, truncated, info
+
+    def _end_episode(self, info):
+        steps = np.array(self._steps, dtype=STEP_DTYPE)
+        events = np.array(self._events, dtype=EVENT_DTYPE)
+        record = np.zeros(1, dtype=EPISODE_DTYPE)
+        record["seed"] = self._seed
+        record["step_start"] = self._counts["steps"]
+        record["event_start"] = self._counts["events"]
+        record["length"] = len(steps)
+        record["n_initial"] = self._n_initial
+        record["n_events"] = len(events)
+        record["reward"] = self._reward
+        record["healthy"] = info.get("healthy_trees", -1)
+        record["outcome"] = OUTCOME_CODE.get(info.get("outcome"), 255)
+
+        self._files["steps"].write(steps.tobytes())
+        self._files["events"].write(events.tobytes())
+        self._files["episodes"].write(record.tobytes())
+        self._counts["steps"] += len(steps)
+        self._counts["events"] += len(events)
+        self._counts["episodes"] += 1
+        self._events.clear()
+        self._steps.clear()
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    @property
+    def num_episodes(self):
+        return self._counts["episodes"]
+
+    def flush(self):
+        # 에피소드 레코드가 가리키는 스텝/전이가 먼저 디스크에 있도록 순서대로 비웁니다.
+        for key in ("steps", "events", "episodes"):
+            self._files[key].flush()
+        self._pending = 0
+
+    def close(self):
+        if self._files:
+            self.flush()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self.sim.__dict__.pop("_set_tree_state", None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==========================================
+# [재생] 임의 스텝 복원 / 렌더링 / 사후 지표
+# ==========================================
+class EpisodeReplay:
+    """
+    녹화 폴더를 memmap으로 열어 에피소드 단위로 조회합니다. 다시 시뮬레이션하지 않고,
+    레이아웃의 초기 상태에 전이를 적용해 원하는 스텝의 격자를 복원합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_NAME)) as f:
+            self.meta = json.load(f)
+        self.env_kwargs = self.meta["env_kwargs"]
+        # 레이아웃(초기 상태, 나무 좌표/구역)만 필요하므로 NumPy 시뮬레이터로 만듭니다.
+        self.sim = ForestFireSim(**self.env_kwargs)
+        self.layout = self.sim.layout
+        self._renderer = None
+        self.refresh()
+
+    def refresh(self):
+        """녹화 중인 폴더라면 그 사이 완성된 에피소드까지 다시 엽니다."""
+        arrays = {key: open_records(os.path.join(self.path, name), magic, dtype, kind="a replay file")
+                  for key, (name, magic, dtype) in FILES.items()}
+        self.episodes = arrays["episodes"]
+        self.steps = arrays["steps"]
+        self.events = arrays["events"]
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def find(self, outcome=None, min_reward=None, max_reward=None):
+        """조건에 맞는 에피소드 번호 배열 (예: find("failure"))"""
+        mask = np.ones(len(self.episodes), dtype=bool)
+        if outcome is not None:
+            mask &= self.episodes["outcome"] == OUTCOME_CODE[outcome]
+        if min_reward is not None:
+            mask &= self.episodes["reward"] >= min_reward
+        if max_reward is not None:
+            mask &= self.episodes["reward"] <= max_reward
+        return np.flatnonzero(mask)
+
+    def summary(self):
+        ep = self.episodes
+        n = len(ep)
+        return {
+            "episodes": n,
+            "outcomes": {name: int(np.count_nonzero(ep["outcome"] == code)) for name, code in OUTCOME_CODE.items()},
+            "reward_mean": float(ep["reward"].mean()) if n else 0.0,
+            "length_mean": float(ep["length"].mean()) if n else 0.0,
+            "steps": len(self.steps),
+            "events": len(self.events),
+        }
+
+    def _episode(self, i):
+        ep = self.episodes[i]
+        s, e = int(ep["step_start"]), int(ep["event_start"])
+        return ep, self.steps[s:s + int(ep["length"])], self.events[e:e + int(ep["n_events"])]
+
+    def _agent_at(self, steps, step):
+        if step == 0:
+            return self.sim.tank_pos, self.sim.max_water
+        row = steps[step - 1]
+        return (int(row["x"]), int(row["y"])), int(row["water"])
+
+    def state_at(self, i, step):
+        """
+        에피소드 i의 step번째 스텝 직후 상태 (0은 리셋 직후).
+        반환값: (격자 상태 (size, size) uint8, 에이전트 위치, 남은 물)
+        """
+        ep, steps, events = self._episode(i)
+        if not 0 <= step <= len(steps):
+            raise IndexError(f"Episode {i} has {len(steps)} steps (requested step {step})")
+        n = int(ep["n_initial"]) + int(steps["n_events"][:step].sum())
+        state = self.layout.initial_state.copy()
+        if n:
+            # 같은 나무가 여러 번 바뀌었다면 마지막 전이만 반영합니다.
+            applied = np.asarray(events[:n])[::-1]
+            trees, last = np.unique(applied["tree"], return_index=True)
+            state.reshape(-1)[self.layout.tree_cell[trees]] = applied["state"][last]
+        pos, water = self._agent_at(steps, step)
+        return state, pos, water
+
+    def iter_states(self, i):
+        """
+        에피소드 i를 처음부터 스텝 순으로 (step, 상태, 에이전트 위치, 남은 물)을 돌려줍니다.
+        전이만 차례로 적용하므로 에피소드 전체를 훑는 비용은 스텝 수 + 전이 수에 비례합니다.
+        돌려주는 상태 배열은 다음 스텝에서 덮어써지므로 보관하려면 복사하세요.
+        """
+        ep, steps, events = self._episode(i)
+        state = self.layout.initial_state.copy()
+        flat = state.reshape(-1)
+        cells = self.layout.tree_cell[events["tree"]]
+        values = np.asarray(events["state"])
+        end = int(ep["n_initial"])
+        flat[cells[:end]] = values[:end]
+        yield 0, state, self.sim.tank_pos, self.sim.max_water
+        for step, row in enumerate(steps, 1):
+            start, end = end, end + int(row["n_events"])
+            flat[cells[start:end]] = values[start:end]
+            yield step, state, (int(row["x"]), int(row["y"])), int(row["water"])
+
+    # --- 렌더링 ---
+    def _render(self, state, pos, tile_size):
+        # MiniGrid 렌더러는 처음 그릴 때만 불러옵니다. 연속 스텝은 바뀐 타일만 다시 그립니다.
+        if self._renderer is None:
+            from minigrid_forest_env import ForestFireEnv
+            self._renderer = ForestFireEnv(**self.env_kwargs)
+        r = self._renderer
+        r.state[:] = state
+        r.agent_pos = pos
+        r.agent_dir = 0
+        return r._render_frame(tile_size)
+
+    def render(self, i, step, tile_size=32):
+        state, pos, _ = self.state_at(i, step)
+        return self._render(state, pos, tile_size).copy()
+
+    def write_frames(self, i, writer, tile_size=32):
+        """에피소드 i의 모든 스텝을 그려 writer(minigrid_forest_video.FrameWriter)에 씁니다."""
+        for _, state, pos, _ in self.iter_states(i):
+            writer.write(self._render(state, pos, tile_size))
+        return writer.count
+
+    # --- 사후 지표 ---
+    def metrics(self, i):
+        """
+        전이 목록만으로 에피소드 i의 스텝별 화재 수 / 건강한 나무 수 / 누적 보상과 전이 합계를 계산합니다.
+        점화는 항상 건강한 나무에서, 전소/진압은 항상 불타는 나무에서 일어나므로 이전 상태를 따로 저장하지 않습니다.
+        """
+        ep, steps, events = self._episode(i)
+        length = len(steps)
+        n_initial = int(ep["n_initial"])
+        step_of = np.concatenate([np.zeros(n_initial, dtype=np.intp),
+                                  np.repeat(np.arange(1, length + 1), steps["n_events"].astype(np.intp))])
+        new_state = np.asarray(events["state"])
+        ignite = new_state == BURNING
+        quench = (new_state == BURNT) | (new_state == EXTINGUISHED)
+
+        ignitions = np.bincount(step_of, weights=ignite, minlength=length + 1)
+        fires = np.cumsum(ignitions - np.bincount(step_of, weights=quench, minlength=length + 1)).astype(np.int64)
+        healthy = len(self.layout.tree_cell) - np.cumsum(ignitions).astype(np.int64)
+        burnt_trees = np.asarray(events["tree"])[ignite]
+        zone_healthy = self.layout.zone_total - np.bincount(self.layout.tree_zone[burnt_trees], minlength=3)
+        rewards = np.asarray(steps["reward"], dtype=np.float64)
+
+        code = int(ep["outcome"])
+        return {
+            "length": length,
+            "reward": float(ep["reward"]),
+            "outcome": OUTCOMES[code] if code < len(OUTCOMES) else None,
+            "seed": int(ep["seed"]),
+            "fires": fires,
+            "healthy": healthy,
+            "returns": np.concatenate([[0.0], np.cumsum(rewards)]),
+            "positions": np.stack([steps["x"], steps["y"]], axis=1).astype(np.intp),
+            "peak_fires": int(fires.max()),
+            "ignited": int(ignite.sum()) - n_initial,
+            "burnt": int(np.count_nonzero(new_state == BURNT)),
+            "extinguished": int(np.count_nonzero(new_state == EXTINGUISHED)),
+            "zone_health": np.where(self.layout.zone_total > 0,
+                                    zone_healthy / np.maximum(self.layout.zone_total, 1), 1.0).tolist(),
+        }
+
+    def close(self):
+        if self._renderer is not None:
+            self._renderer.close()
+            self._renderer = None
+
+
+# ==========================================
+# [녹화 실행] 정책으로 에피소드를 모아 저장
+# ==========================================
+def load_policy(model_path, device="cpu"):
+    """.npz면 NumpyPolicy, 그 외에는 PPO 모델(.zip 제외 경로)을 불러와 policy(obs) -> action을 돌려줍니다."""
+    if model_path.endswith(".npz"):
+        from minigrid_forest_policy import NumpyPolicy
+        return NumpyPolicy(model_path)
+    from stable_baselines3 import PPO
+    model = PPO.load(model_path, device=device)
+    return lambda obs: int(model.predict(obs, deterministic=True)[0])
+
+
+def record_episodes(policy, out_dir, n_episodes, seed=0, env_kwargs=None):
+    """ForestFireSim으로 에피소드 n_episodes개를 진행하며 녹화합니다. 에피소드 k는 seed + k로 리셋합니다."""
+    sim = ForestFireSim(**(env_kwargs or {}))
+    with EpisodeRecorder(sim, out_dir) as recorder:
+        start = recorder.num_episodes
+        for k in range(n_episodes):
+            obs, _ = recorder.reset(seed=seed + start + k)
+            while True:
+                obs, _, terminated, truncated, _ = recorder.step(policy(obs))
+                if terminated or truncated:
+                    break
+        return recorder.num_episodes - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record episodes as cell transitions and replay them")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="정책으로 에피소드를 진행하며 녹화")
+    rec.add_argument("out", help="녹화 폴더 (있으면 이어서 추가)")
+    rec.add_argument("--model", required=True, help=".npz(NumpyPolicy) 또는 .zip 제외한 PPO 모델 경로")
+    rec.add_argument("--episodes", type=int, default=100)
+    rec.add_argument("--seed", type=int, default=0)
+
+    info = sub.add_parser("info", help="녹화 요약과 조건에 맞는 에피소드 목록")
+    info.add_argument("path")
+    info.add_argument("--outcome", choices=OUTCOMES)
+    info.add_argument("--limit", type=int, default=20)
+
+    show = sub.add_parser("render", help="에피소드를 PNG 폴더/동영상으로, 또는 한 스텝을 PNG로 저장")
+    show.add_argument("path")
+    show.add_argument("--episode", type=int, required=True)
+    show.add_argument("--step", type=int, help="이 스텝 하나만 PNG로 저장")
+    show.add_argument("--out", required=True, help="PNG 파일(--step) / PNG 폴더 / 동영상 파일")
+    show.add_argument("--fps", type=int, default=10)
+    show.add_argument("--tile-size", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        policy = load_policy(args.model)
+        start = time.perf_counter()
+        n = record_episodes(policy, args.out, args.episodes, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        replay = EpisodeReplay(args.out)
+        size = sum(os.path.getsize(os.path.join(args.out, name)) for name, _, _ in FILES.values())
+        print(f"[Info] Recorded {n} episodes in {elapsed:.1f}s -> {args.out} "
+              f"({len(replay)} total, {size / max(len(replay), 1) / 1024:.1f} KiB/episode)")
+
+    elif args.command == "info":
+        replay = EpisodeReplay(args.path)
+        print(json.dumps(replay.summary(), indent=2))
+        for i in replay.find(args.outcome)[:args.limit].tolist():
+            m = replay.metrics(i)
+            print(f"[Episode {i}] {m['outcome']} | reward {m['reward']:.2f} | length {m['length']} | "
+                  f"peak fires {m['peak_fires']} | ignited {m['ignited']} | extinguished {m['extinguished']} | "
+                  f"burnt {m['burnt']} | seed {m['seed']}")
+
+    else:
+        from minigrid_forest_video import FrameWriter, write_png
+        replay = EpisodeReplay(args.path)
+        if args.step is not None:
+            write_png(args.out, replay.render(args.episode, args.step, args.tile_size))
+            print(f"[Info] Frame saved at: {args.out}")
+        else:
+            with FrameWriter(args.out, fps=args.fps) as writer:
+                replay.write_frames(args.episode, writer, args.tile_size)
+            print(f"[Info] {writer.count} frames saved at: {args.out}")
+        replay.close()
@@ -1,89 +1,137 @@
-import gymnasium as gym
+import argparse
 from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor # 로그 기록용 래퍼
 import os
-import numpy as np
-import matplotlib.pyplot as plt # 그래프 그리기용
-import minigrid_forest_env  # 환경 등록
+from minigrid_forest_parallel import make_parallel_vec_env
+from minigrid_forest_log import EpisodeLogCallback
+from minigrid_forest_checkpoint import AsyncCheckpointCallback, latest_checkpoint
 
 # ==========================================
 # [설정] 경로 및 파라미터
 # ==========================================
 # 1. 경로 설정
-BASE_PATH = r"C:\Users\CIL\Desktop\minigird_forest"
-MODEL_DIR = os.path.join(BASE_PATH, "learned_model")
-GRAPH_DIR = os.path.join(BASE_PATH, "reward_graph")
-LOG_DIR = os.path.join(BASE_PATH, "logs") # 학습 로그(CSV) 임시 저장소
-
+# FOREST_BASE_PATH 환경 변수 또는 --base-path로 바꿀 수 있습니다. (기본: 이 스크립트가 있는 폴더)
+BASE_PATH = os.environ.get("FOREST_BASE_PATH", os.path.dirname(os.path.abspath(__file__)))
+# 모델(learned_model), 그래프(reward_graph), 학습 로그(logs), 체크포인트(checkpoints)는 이 경로 아래에 만듭니다.
 MODEL_NAME = "ppo_forest_fire_v22"
-FULL_MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
 
 # 2. 환경 및 학습 파라미터
 TOTAL_TIMESTEPS = 30000000 
 DEVICE = 'cpu'
+GAMMA = 0.99  # PPO 할인율 (매크로 귀환 모드의 구간 내 보상 할인에도 사용)
 
-# ==========================================
-# [함수] 학습 결과 그래프 그리기
-# ==========================================
-def plot_results(log_folder, save_folder, title="Learning Curve"):
-    """
-    Monitor로 저장된 log.csv 파일을 읽어서 보상 그래프를 그립니다.
-    """
-    from stable_baselines3.common.results_plotter import load_results, ts2xy
-    
-    # 로그 데이터 로드
-    # load_results는 Monitor가 저장한 csv를 읽어옵니다.
-    x, y = ts2xy(load_results(log_folder), 'timesteps')
-    
-    if len(x) > 0:
-        plt.figure(figsize=(10, 5))
-        
-        # 원본 데이터 (투명하게)
-        plt.plot(x, y, alpha=0.3, label='Raw Reward', color='blue')
-    
-        
-        plt.xlabel('Timesteps')
-        plt.ylabel('Episode Reward')
-        plt.title(title)
-        plt.legend()
-        plt.grid(True)
-        
-        # 그래프 저장
-        save_path = os.path.join(save_folder, f"{title}.png")
-        plt.savefig(save_path)
-        print(f"[Info] Reward graph saved at: {save_path}")
-        plt.close()
+# 3. 병렬 학습 파라미터 (기본값은 기존과 같은 단일 환경 학습)
+N_WORKERS = 1        # 워커 프로세스 수
+ENVS_PER_WORKER = 1  # 워커당 환경 수 (2 이상이면 ForestFireVecEnv 배치 환경 사용)
+SEED = None
+
+# 4. 로그 파라미터
+PLOT_FREQ = 200000  # 학습 중 보상 그래프 갱신 주기 (스텝)
+
+# 5. 체크포인트 파라미터
+CHECKPOINT_FREQ = 1000000  # 체크포인트 저장 주기 (스텝)
+KEEP_CHECKPOINTS = 3       # 최근 체크포인트 보관 개수 (best.zip은 별도 보관)
 
 # ==========================================
 # [메인] 학습 실행
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ForestFire PPO training")
+    parser.add_argument("--n-workers", type=int, default=N_WORKERS, help="환경을 돌릴 워커 프로세스 수")
+    parser.add_argument("--envs-per-worker", type=int, default=ENVS_PER_WORKER, help="워커 하나가 맡는 환경 수")
+    parser.add_argument("--seed", type=int, default=SEED, help="워커 i의 환경 j는 seed + i * envs_per_worker + j를 사용")
+    parser.add_argument("--pin-cpus", action="store_true", help="워커 프로세스를 CPU 코어 하나에 고정 (Linux, --n-workers 2 이상일 때만)")
+    parser.add_argument("--timesteps", type=int, default=TOTAL_TIMESTEPS)
+    parser.add_argument("--device", default=DEVICE)
+    parser.add_argument("--base-path", default=BASE_PATH)
+    parser.add_argument("--plot-freq", type=int, default=PLOT_FREQ, help="학습 중 보상 그래프 갱신 주기 (스텝)")
+    parser.add_argument("--checkpoint-freq", type=int, default=CHECKPOINT_FREQ, help="체크포인트 저장 주기 (스텝)")
+    parser.add_argument("--keep-checkpoints", type=int, default=KEEP_CHECKPOINTS)
+    parser.add_argument("--resume", action="store_true", help="가장 최근 체크포인트에서 이어서 학습")
+    parser.add_argument("--macro-return", action="store_true",
+                        help="강제 귀환 구간을 한 스텝으로 묶어 진행하고 MacroPPO(전이별 gamma^k 할인)로 학습 (단일 환경 워커 전용)")
+    parser.add_argument("--obs-mode", choices=["vector", "grid"], default="vector",
+                        help="관측 형식: 10차원 벡터(MlpPolicy) 또는 격자 평면(CnnPolicy + ForestGridCNN)")
+    args = parser.parse_args()
+    if args.macro_return and args.envs_per_worker > 1:
+        parser.error("--macro-return needs single-env workers (--envs-per-worker 1)")
+
+    model_dir = os.path.join(args.base_path, "learned_model")
+    graph_dir = os.path.join(args.base_path, "reward_graph")
+    log_dir = os.path.join(args.base_path, "logs")  # 학습 로그(CSV) 임시 저장소
+    checkpoint_dir = os.path.join(args.base_path, "checkpoints")
+    full_model_path = os.path.join(model_dir, MODEL_NAME)
+
     # 1. 폴더 생성
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    os.makedirs(GRAPH_DIR, exist_ok=True)
-    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+    os.makedirs(graph_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+
+    env_kwargs = {}
+    if args.macro_return:
+        env_kwargs.update(macro_return=True, gamma=GAMMA)
+    if args.obs_mode != "vector":
+        env_kwargs["obs_mode"] = args.obs_mode
 
     # 2. 환경 생성 및 Monitor 래핑
-    # Monitor는 학습 데이터를 csv로 기록해줍니다 (그래프용)
-    env = gym.make("ForestFireMLP-v22")
-    env = Monitor(env, LOG_DIR) 
+    # Monitor는 학습 데이터를 csv로 기록해줍니다 (그래프용). 워커가 여러 개면 워커별 csv가 생기고,
+    # 학습 곡선은 아래 EpisodeLogCallback의 바이너리 로그로 그립니다.
+    env = make_parallel_vec_env(
+        n_workers=args.n_workers,
+        envs_per_worker=args.envs_per_worker,
+        seed=args.seed,
+        log_dir=log_dir,
+        pin_cpus=args.pin_cpus,
+        env_kwargs=env_kwargs or None,
+    )
 
-    print(f"Training Start... (Steps: {TOTAL_TIMESTEPS})")
+    print(f"Training Start... (Steps: {args.timesteps}, Envs: {env.num_envs} = {args.n_workers} workers x {args.envs_per_worker})")
     
     # 3. 모델 정의 및 학습
-    model = PPO("MlpPolicy", env, verbose=1, device=DEVICE)
-    model.learn(total_timesteps=TOTAL_TIMESTEPS)
+    # 에피소드 요약은 바이너리 로그(episodes.bin)에 청크 단위로 추가되고, 보상 그래프는 학습 중에 주기적으로 갱신됩니다.
+    graph_path = os.path.join(graph_dir, "ForestFire_Training_Result.png")
+    # 체크포인트(정책, 옵티마이저 상태, 누적 스텝)는 백그라운드 스레드에서 주기적으로 저장됩니다.
+    # 이어서 학습할 체크포인트가 있을 때만 기존 로그 / 체크포인트 계보를 이어 받습니다.
+    resume_path = latest_checkpoint(checkpoint_dir) if args.resume else None
+    # 매크로 귀환 전이는 k스텝을 건너뛰므로, 가치 부트스트랩을 gamma^k로 할인하는 MacroPPO로 학습합니다.
+    if args.macro_return:
+        from minigrid_forest_macro import MacroPPO as algo
+    else:
+        algo = PPO
+    log_callback = EpisodeLogCallback(
+        os.path.join(log_dir, "episodes.bin"), graph_path,
+        plot_freq=args.plot_freq, title="ForestFire_Training_Result", resume=resume_path is not None,
+    )
+    checkpoint_callback = AsyncCheckpointCallback(
+        checkpoint_dir, save_freq=args.checkpoint_freq, keep_last=args.keep_checkpoints,
+        resume=resume_path is not None, verbose=1,
+    )
+    if resume_path:
+        model = algo.load(resume_path, env=env, device=args.device)
+        print(f"[Info] Resuming from: {resume_path} (Steps: {model.num_timesteps})")
+    else:
+        if args.resume:
+            print(f"[Warning] No checkpoint found in {checkpoint_dir}, starting from scratch.")
+        if args.obs_mode == "grid":
+            from minigrid_forest_cnn import ForestGridCNN
+            model = algo("CnnPolicy", env, gamma=GAMMA, verbose=1, device=args.device, seed=args.seed,
+                        policy_kwargs={"features_extractor_class": ForestGridCNN})
+        else:
+            model = algo("MlpPolicy", env, gamma=GAMMA, verbose=1, device=args.device, seed=args.seed)
+    model.learn(
+        total_timesteps=max(args.timesteps - model.num_timesteps, 0),
+        callback=[log_callback, checkpoint_callback],
+        reset_num_timesteps=resume_path is None,
+    )
     print("Training Finished!")
     
     # 4. 모델 저장
-    model.save(FULL_MODEL_PATH)
-    print(f"[Info] Model saved at: {FULL_MODEL_PATH}.zip")
+    model.save(full_model_path)
+    print(f"[Info] Model saved at: {full_model_path}.zip")
     
-    # 5. 그래프 그리기 및 저장
-    try:
-        plot_results(LOG_DIR, GRAPH_DIR, title="ForestFire_Training_Result")
-    except Exception as e:
-        print(f"[Warning] Could not plot graph: {e}")
-        print("Make sure 'matplotlib' and 'pandas' are installed.")
+    # 5. 그래프 (학습 종료 시 콜백이 마지막으로 갱신)
+    if log_callback.plot_path:
+        print(f"[Info] Reward graph saved at: {graph_path}")
+    else:
+        print("[Warning] Could not plot graph. Make sure 'matplotlib' is installed.")
 
     env.close()
\ No newline at end of file
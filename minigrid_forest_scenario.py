@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+from minigrid_forest_layout import HEALTHY
+
+# ==========================================
+# [설정] 시나리오 뱅크 형식
+# ==========================================
+# 파일 = 매직 8바이트 + 메타 JSON 길이 8바이트 + 메타 JSON(64바이트 경계까지 채움) + 고정 크기 레코드의 연속
+# 메타에는 맵 구성(size, map_seed, 나무 수)과 시나리오당 최대 화재 수가 들어 있어, 다른 맵에 잘못 물리는 것을 막습니다.
+BANK_MAGIC = b"FFSCNBK1"
+HEADER_ALIGN = 64
+
+_BANK_CACHE = {}
+
+
+def scenario_dtype(max_fires):
+    return np.dtype([
+        ("fires", "<u4", (max_fires,)),  # 초기 화재 나무 번호 (앞의 n_fires개만 유효)
+        ("n_fires", "<u2"),
+        ("spread_prob", "<f4"),          # 에피소드별 확산 확률 (NaN이면 환경 기본값)
+        ("burn_out_prob", "<f4"),        # 에피소드별 전소 확률 (NaN이면 환경 기본값)
+        ("difficulty", "<f4"),           # 커리큘럼용 난이도 점수 (scenario_difficulty 참고)
+    ])
+
+
+def _header_bytes(meta):
+    body = json.dumps(meta).encode()
+    size = 16 + len(body)
+    pad = -size % HEADER_ALIGN
+    return BANK_MAGIC + np.int64(len(body) + pad).tobytes() + body + b" " * pad
+
+
+def scenario_difficulty(layout, fires, spread_prob, tank_pos):
+    """
+    난이도 점수 = p * sum(화재마다 (건강한 4-이웃 수) x (탱크에서의 맨해튼 거리)).
+    드론이 탱크에서 각 화재로 곧장 날아가는 동안 그 화재가 번질 기댓값에 비례하는 휴리스틱입니다.
+    fires는 (N, k) 나무 번호 배열이고, 유효하지 않은 칸은 -1로 채웁니다.
+    """
+    healthy_nb = (layout.initial_state.reshape(-1)[layout.neighbors4] == HEALTHY).sum(axis=1)
+    dist = np.abs(layout.tree_x - tank_pos[0]) + np.abs(layout.tree_y - tank_pos[1])
+    weight = np.append(healthy_nb * dist, 0.0)  # -1 -> 마지막 칸(0)
+    return spread_prob * weight[fires].sum(axis=1)
+
+
+# ==========================================
+# [뱅크] memmap 읽기 / 생성
+# ==========================================
+class ScenarioBank:
+    """
+    미리 만든 초기 조건(초기 화재 위치, 선택적으로 에피소드별 확산/전소 확률과 난이도)을 memmap으로 엽니다.
+    같은 프로세스의 환경들은 get()으로 하나의 뱅크를 공유하고, 다른 프로세스도 같은 파일 페이지를 공유합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic = f.read(8)
+            if magic != BANK_MAGIC:
+                raise ValueError(f"Not a scenario bank: {path}")
+            length = int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+            self.meta = json.loads(f.read(length))
+        self.dtype = scenario_dtype(self.meta["max_fires"])
+        offset = 16 + length
+        n = (os.path.getsize(path) - offset) // self.dtype.itemsize
+        self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=offset, shape=(n,))
+        self._selections = {}
+
+    @classmethod
+    def get(cls, path):
+        key = os.path.abspath(path)
+        bank = _BANK_CACHE.get(key)
+        if bank is None:
+            bank = cls(path)
+            _BANK_CACHE[key] = bank
+        return bank
+
+    def __len__(self):
+        return len(self.records)
+
+    def check(self, layout):
+        """뱅크가 만들어진 맵과 환경의 맵이 같은지 확인합니다."""
+        meta = self.meta
+        if (meta["size"], meta["map_seed"], meta["n_trees"]) != (layout.size, layout.map_seed, len(layout.tree_cell)):
+            raise ValueError(
+                f"Scenario bank {self.path} was generated for size={meta['size']}, map_seed={meta['map_seed']} "
+                f"({meta['n_trees']} trees), not size={layout.size}, map_seed={layout.map_seed}"
+            )
+
+    def fires(self, i):
+        record = self.records[i]
+        return np.asarray(record["fires"][:record["n_fires"]], dtype=np.intp)
+
+    def select(self, min_difficulty=None, max_difficulty=None):
+        """난이도가 [min, max] 안에 드는 시나리오 번호 배열 (같은 범위는 한 번만 계산)"""
+        key = (min_difficulty, max_difficulty)
+        selection = self._selections.get(key)
+        if selection is None:
+            difficulty = self.records["difficulty"]
+            mask = np.ones(len(self.records), dtype=bool)
+            if min_difficulty is not None:
+                mask &= difficulty >= min_difficulty
+            if max_difficulty is not None:
+                mask &= difficulty <= max_difficulty
+            selection = np.flatnonzero(mask)
+            if selection.size == 0:
+                raise ValueError(f"No scenario with difficulty in [{min_difficulty}, {max_difficulty}]")
+            self._selections[key] = selection
+        return selection
+
+    def sample(self, rng, difficulty=None):
+        """rng로 시나리오 하나를 고릅니다. difficulty=(min, max)를 주면 그 범위 안에서만 고릅니다."""
+        if difficulty is None:
+            return int(rng.integers(len(self.records)))
+        pool = self.select(*difficulty)
+        return int(pool[rng.integers(pool.size)])
+
+
+def generate_bank(path, count, size=24, map_seed=None, n_fires=(3, 3), spread_probs=None, burn_out_probs=None,
+                  seed=0, chunk_size=65536):
+    """
+    시나리오 count개를 만들어 path에 저장합니다. 시나리오 i는 default_rng([seed, i])로 만들므로,
+    같은 seed로 만들면 개수와 관계없이 앞부분이 같습니다.
+    - n_fires: (min, max) 초기 화재 수 (시나리오마다 균등 추출)
+    - spread_probs / burn_out_probs: (min, max)를 주면 시나리오마다 균등 추출, None이면 환경 기본값(NaN)
+    """
+    from minigrid_forest_core import ForestFireSim
+
+    sim = ForestFireSim(size=size, map_seed=map_seed)
+    layout = sim.layout
+    n_trees = len(layout.tree_cell)
+    lo, hi = n_fires
+    if not 0 < lo <= hi <= n_trees:
+        raise ValueError(f"n_fires must be within 1..{n_trees}, got {n_fires}")
+    meta = {"version": 1, "size": size, "map_seed": map_seed, "n_trees": n_trees, "max_fires": hi, "seed": seed}
+    dtype = scenario_dtype(hi)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_header_bytes(meta))
+        for start in range(0, count, chunk_size):
+            n = min(chunk_size, count - start)
+            chunk = np.zeros(n, dtype=dtype)
+            fires = np.full((n, hi), -1, dtype=np.int64)
+            for j in range(n):
+                rng = np.random.default_rng([seed, start + j])
+                k = int(rng.integers(lo, hi + 1))
+                fires[j, :k] = rng.choice(n_trees, k, replace=False)
+                chunk["n_fires"][j] = k
+                chunk["spread_prob"][j] = np.nan if spread_probs is None else rng.uniform(*spread_probs)
+                chunk["burn_out_prob"][j] = np.nan if burn_out_probs is None else rng.uniform(*burn_out_probs)
+            chunk["fires"] = np.maximum(fires, 0)
+            p = np.where(np.isnan(chunk["spread_prob"]), sim.default_spread_prob, chunk["spread_prob"])
+            chunk["difficulty"] = scenario_difficulty(layout, fires, p, sim.tank_pos)
+            f.write(chunk.tobytes())
+    os.replace(tmp, path)
+    return ScenarioBank(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate or inspect a ForestFire scenario bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="시나리오 뱅크 생성")
+    gen.add_argument("out")
+    gen.add_argument("--count", type=int, default=100000)
+    gen.add_argument("--size", type=int, default=24)
+    gen.add_argument("--map-seed", type=int, default=None)
+    gen.add_argument("--fires", default="3", help='초기 화재 수 ("3" 또는 범위 "1:6")')
+    gen.add_argument("--spread-probs", help='에피소드별 확산 확률 범위 "lo:hi" (생략 시 환경 기본값)')
+    gen.add_argument("--burn-out-probs", help='에피소드별 전소 확률 범위 "lo:hi" (생략 시 환경 기본값)')
+    gen.add_argument("--seed", type=int, default=0)
+
+    info = sub.add_parser("info", help="뱅크 요약")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    def span(value, cast=float):
+        if value is None:
+            return None
+        parts = [cast(v) for v in value.split(":")]
+        return (parts[0], parts[-1])
+
+    if args.command == "generate":
+        start = time.perf_counter()
+        bank = generate_bank(args.out, args.count, size=args.size, map_seed=args.map_seed,
+                             n_fires=span(args.fires, int), spread_probs=span(args.spread_probs),
+                             burn_out_probs=span(args.burn_out_probs), seed=args.seed)
+        print(f"[Info] {len(bank)} scenarios generated in {time.perf_counter() - start:.1f}s -> {args.out}")
+    else:
+        bank = ScenarioBank(args.path)
+
+    d = bank.records["difficulty"]
+    print(f"[Bank] {len(bank)} scenarios | map size={bank.meta['size']} map_seed={bank.meta['map_seed']} "
+          f"trees={bank.meta['n_trees']} | fires {bank.records['n_fires'].min()}-{bank.records['n_fires'].max()}")
+    if len(bank):
+        p5, p50, p95 = np.percentile(d, [5, 50, 95])
+        print(f"[Bank] difficulty p5 {p5:.3f} | p50 {p50:.3f} | p95 {p95:.3f}")
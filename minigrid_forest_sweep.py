@@ -0,0 +1,251 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# ==========================================
+# [설정] 탐색 가능한 파라미터
+# ==========================================
+# 보상/페널티 계수와 화재 동역학 (ForestFireSim 생성자 인자)
+REWARD_PARAMS = (
+    "reward_extinguish_base", "reward_risk_factor", "reward_per_surviving_tree",
+    "penalty_step", "penalty_wall", "penalty_spread", "penalty_burnt", "penalty_failure",
+)
+DYNAMICS_PARAMS = ("fire_spread_prob", "burn_out_prob")
+SWEEP_PARAMS = REWARD_PARAMS + DYNAMICS_PARAMS
+METRICS = ("reward", "success", "healthy_trees")
+
+
+# ==========================================
+# [탐색 공간] 격자 / 무작위
+# ==========================================
+def parse_param(spec):
+    """
+    "name=값" 형식의 탐색 범위를 (name, 분포) 로 바꿉니다.
+    - "0.005,0.01,0.02": 후보 목록 (격자 탐색 / 무작위 탐색 모두)
+    - "uniform:1:5", "loguniform:0.001:0.1", "int:1:10": 연속/정수 분포 (무작위 탐색 전용)
+    """
+    name, _, values = spec.partition("=")
+    if name not in SWEEP_PARAMS:
+        raise ValueError(f"Unknown sweep parameter: {name} (choose from {', '.join(SWEEP_PARAMS)})")
+    kind, _, bounds = values.partition(":")
+    if kind in ("uniform", "loguniform", "int"):
+        low, high = (float(v) for v in bounds.split(":"))
+        return name, {"dist": kind, "low": low, "high": high}
+    return name, [float(v) for v in values.split(",")]
+
+
+def load_space(path=None, specs=()):
+    """JSON 파일({"name": [..] 또는 {"dist", "low", "high"}})과 --param 항목을 합쳐 탐색 공간을 만듭니다."""
+    space = {}
+    if path:
+        with open(path) as f:
+            space.update(json.load(f))
+    for spec in specs:
+        name, dist = parse_param(spec)
+        space[name] = dist
+    unknown = set(space) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    return space
+
+
+def grid_trials(space):
+    """모든 후보 목록의 곱집합. 연속 분포가 있으면 격자 탐색을 할 수 없습니다."""
+    names = sorted(space)
+    for name in names:
+        if not isinstance(space[name], list):
+            raise ValueError(f"Grid search needs a list of values for {name}")
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_trials(space, n_trials, seed=0):
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        params = {}
+        for name in sorted(space):
+            dist = space[name]
+            if isinstance(dist, list):
+                params[name] = float(dist[rng.integers(len(dist))])
+            elif dist["dist"] == "uniform":
+                params[name] = float(rng.uniform(dist["low"], dist["high"]))
+            elif dist["dist"] == "loguniform":
+                params[name] = float(np.exp(rng.uniform(np.log(dist["low"]), np.log(dist["high"]))))
+            elif dist["dist"] == "int":
+                params[name] = int(rng.integers(dist["low"], dist["high"] + 1))
+            else:
+                raise ValueError(f"Unknown distribution for {name}: {dist['dist']}")
+        trials.append(params)
+    return trials
+
+
+# ==========================================
+# [시행] 짧은 학습 + 중간 평가 + 중앙값 조기 종료
+# ==========================================
+def should_stop(value, others, min_trials):
+    """같은 평가 시점(rung)에 보고된 다른 시행들의 중앙값보다 나쁘면 중단합니다. (median stopping rule)"""
+    return len(others) >= max(min_trials, 1) and value < float(np.median(others))
+
+
+def run_trial(trial_id, params, config, reports, lock):
+    """
+    워커 프로세스에서 시행 하나를 진행합니다. eval_every 스텝마다 고정 시드 에피소드로 평가해 reports에 올리고,
+    다른 시행들의 같은 시점 중앙값보다 나쁘면 남은 학습을 건너뜁니다.
+    timesteps가 eval_every로 나누어떨어지지 않으면 남은 스텝은 마지막 평가 구간에 더해 학습합니다.
+    평가는 모든 시행이 같은 기준 화재 동역학(config["eval_dynamics"], 비어 있으면 환경 기본값)과 기본 보상 설정을 써서,
+    보상 계수나 학습 동역학이 다른 시행끼리도 같은 문제에서의 성능으로 비교합니다.
+    """
+    import torch
+    from stable_baselines3 import PPO
+    from minigrid_forest_eval import evaluate, summarize
+    from minigrid_forest_parallel import make_parallel_vec_env
+    from minigrid_forest_vec_env import ForestFireVecEnv
+
+    torch.set_num_threads(1)  # 시행마다 코어 하나
+    start = time.perf_counter()
+    result = {"trial": trial_id, "status": "completed", **params, "rungs": 0, "timesteps": 0,
+              "metric": None, "best": None, "success_rate": None, "healthy_trees": None, "curve": "", "error": ""}
+    curve = []
+    env = eval_env = None
+    try:
+        seed = config["seed"] + trial_id
+        env = make_parallel_vec_env(envs_per_worker=config["envs_per_trial"], seed=seed, env_kwargs=params)
+        eval_env = ForestFireVecEnv(config["eval_envs"], seed=config["eval_seed"], **config["eval_dynamics"])
+        model = PPO("MlpPolicy", env, n_steps=config["n_steps"], gamma=config["gamma"], seed=seed, device="cpu")
+
+        n_rungs = config["timesteps"] // config["eval_every"]
+        if n_rungs == 0:
+            raise ValueError(f"eval_every ({config['eval_every']}) exceeds timesteps ({config['timesteps']})")
+        for rung in range(n_rungs):
+            steps = config["eval_every"]
+            if rung == n_rungs - 1:
+                steps += config["timesteps"] % config["eval_every"]
+            model.learn(total_timesteps=steps, reset_num_timesteps=False)
+            eval_env.seed(config["eval_seed"])
+            summary = summarize(evaluate(model, eval_env, config["eval_episodes"]))
+            value = {
+                "reward": summary["reward"]["mean"],
+                "success": summary["outcomes"]["success"]["rate"],
+                "healthy_trees": summary["healthy_trees"]["mean"],
+            }[config["metric"]]
+            curve.append(value)
+            result.update(rungs=rung + 1, timesteps=model.num_timesteps, metric=value, best=max(curve),
+                          success_rate=summary["outcomes"]["success"]["rate"],
+                          healthy_trees=summary["healthy_trees"]["mean"])
+            with lock:
+                others = list(reports.get(rung, []))
+                reports[rung] = others + [value]
+            # 마지막 평가 뒤에는 더 학습할 것이 없으므로 중단 판정을 하지 않습니다. (끝까지 학습한 시행은 pruned가 아님)
+            last = rung == n_rungs - 1
+            if not last and rung + 1 >= config["grace_rungs"] and should_stop(value, others, config["min_trials"]):
+                result["status"] = "pruned"
+                break
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    finally:
+        for venv in (env, eval_env):
+            if venv is not None:
+                venv.close()
+    result["curve"] = ";".join(f"{v:.4g}" for v in curve)
+    result["elapsed_s"] = round(time.perf_counter() - start, 1)
+    return result
+
+
+# ==========================================
+# [스케줄러] 로컬 프로세스 풀
+# ==========================================
+def run_sweep(trials, config, out_path, n_jobs=None):
+    """
+    시행들을 코어 수만큼의 프로세스 풀에 나눠 돌리고, 끝나는 순서대로 결과 표(CSV)에 한 줄씩 추가합니다.
+    중간 평가 결과는 Manager 딕셔너리로 공유해 각 시행이 스스로 조기 종료를 판단합니다.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    columns = ["trial", "status"] + sorted({k for t in trials for k in t}) + [
+        "rungs", "timesteps", "metric", "best", "success_rate", "healthy_trees", "elapsed_s", "curve", "error"]
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+    if "forkserver" in mp.get_all_start_methods():
+        # 시행 프로세스가 torch / SB3를 매번 새로 불러오지 않도록 forkserver에 미리 올려 둡니다.
+        mp.set_forkserver_preload(["minigrid_forest_sweep", "minigrid_forest_eval"])
+        ctx = mp.get_context("forkserver")
+    else:
+        ctx = mp.get_context("spawn")
+
+    results = []
+    with ctx.Manager() as manager, open(out_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        f.flush()
+        reports, lock = manager.dict(), manager.Lock()
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=ctx) as pool:
+            futures = [pool.submit(run_trial, i, params, config, reports, lock) for i, params in enumerate(trials)]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                writer.writerow(result)
+                f.flush()
+                metric = "-" if result["metric"] is None else f"{result['metric']:.3f}"
+                print(f"[Sweep] {done}/{len(trials)} trial {result['trial']} {result['status']} "
+                      f"after {result['rungs']} evals | {config['metric']} {metric} | {result['elapsed_s']}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ForestFire reward / fire-dynamics hyperparameter sweep")
+    parser.add_argument("--space", help='탐색 공간 JSON (예: {"fire_spread_prob": [0.005, 0.01]})')
+    parser.add_argument("--param", action="append", default=[],
+                        help='"name=v1,v2" 또는 "name=uniform:lo:hi" / "loguniform:lo:hi" / "int:lo:hi" (반복 가능)')
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=16, help="무작위 탐색 시행 수")
+    parser.add_argument("--n-jobs", type=int, default=None, help="동시에 돌릴 시행 수 (기본: CPU 코어 수)")
+    parser.add_argument("--timesteps", type=int, default=200000, help="시행당 최대 학습 스텝")
+    parser.add_argument("--eval-every", type=int, default=20000, help="중간 평가 주기 (스텝)")
+    parser.add_argument("--eval-episodes", type=int, default=32)
+    parser.add_argument("--eval-envs", type=int, default=16)
+    parser.add_argument("--envs-per-trial", type=int, default=8, help="시행 하나가 학습에 쓰는 배치 환경 수")
+    parser.add_argument("--n-steps", type=int, default=256, help="PPO 롤아웃 길이 (환경당)")
+    parser.add_argument("--gamma", type=float, default=0.99)
+    parser.add_argument("--eval-fire-spread-prob", type=float, default=None,
+                        help="평가에 쓰는 기준 확산 확률 (모든 시행 공통, 기본: 환경 기본값)")
+    parser.add_argument("--eval-burn-out-prob", type=float, default=None,
+                        help="평가에 쓰는 기준 전소 확률 (모든 시행 공통, 기본: 환경 기본값)")
+    parser.add_argument("--metric", choices=METRICS, default="reward", help="조기 종료와 순위에 쓰는 평가 지표")
+    parser.add_argument("--min-trials", type=int, default=4, help="중앙값 비교에 필요한 다른 시행 수")
+    parser.add_argument("--grace-rungs", type=int, default=2, help="이 횟수만큼 평가하기 전에는 중단하지 않음")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="sweep_results.csv")
+    args = parser.parse_args()
+    if args.eval_every > args.timesteps:
+        parser.error(f"--eval-every ({args.eval_every}) must not exceed --timesteps ({args.timesteps})")
+
+    space = load_space(args.space, args.param)
+    if not space:
+        parser.error("Empty search space: pass --space or --param")
+    trials = grid_trials(space) if args.search == "grid" else random_trials(space, args.trials, args.seed)
+    config = {
+        "timesteps": args.timesteps, "eval_every": args.eval_every, "eval_episodes": args.eval_episodes,
+        "eval_envs": args.eval_envs, "eval_seed": args.seed + 10**6, "envs_per_trial": args.envs_per_trial,
+        "n_steps": args.n_steps, "gamma": args.gamma, "metric": args.metric,
+        "min_trials": args.min_trials, "grace_rungs": args.grace_rungs, "seed": args.seed,
+        "eval_dynamics": {k: v for k, v in (("fire_spread_prob", args.eval_fire_spread_prob),
+                                            ("burn_out_prob", args.eval_burn_out_prob)) if v is not None},
+    }
+    print(f"[Info] {len(trials)} trials ({args.search}) on {args.n_jobs or os.cpu_count()} processes -> {args.out}")
+    start = time.perf_counter()
+    results = run_sweep(trials, config, args.out, args.n_jobs)
+
+    ranked = sorted((r for r in results if r["best"] is not None), key=lambda r: r["best"], reverse=True)
+    print(f"\n[Sweep] finished in {time.perf_counter() - start:.0f}s | "
+          f"{sum(r['status'] == 'pruned' for r in results)} pruned, {sum(r['status'] == 'failed' for r in results)} failed")
+    for r in ranked[:5]:
+        params = ", ".join(f"{k}={r[k]:.4g}" for k in sorted(space))
+        print(f"[Top] trial {r['trial']} best {args.metric} {r['best']:.3f} ({r['status']}) | {params}")
@@ -1,13 +1,15 @@
+import argparse
 import gymnasium as gym
 from stable_baselines3 import PPO
 import time
 import os
 import minigrid_forest_env # 환경 등록 필수
+from minigrid_forest_video import FrameWriter, record_episode
 
 # ==========================================
 # [설정] 경로 및 파라미터
 # ==========================================
-BASE_PATH = r"C:\Users\CIL\Desktop\minigird_forest"
+BASE_PATH = os.environ.get("FOREST_BASE_PATH", os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_PATH, "learned_model", "ppo_forest_fire_v22_ver4") # .zip 제외하고 경로 지정
 
 # 학습 때와 동일한 환경 설정 권장
@@ -16,32 +18,51 @@ MODEL_PATH = os.path.join(BASE_PATH, "learned_model", "ppo_forest_fire_v22_ver4"
 # [메인] 테스트 실행
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ForestFire trained model test")
+    parser.add_argument("--model", default=MODEL_PATH, help=".zip 제외한 모델 경로")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--record", help="창 없이 녹화할 폴더 (에피소드마다 PNG 폴더 또는 동영상 파일)")
+    parser.add_argument("--video-format", default="png", choices=["png", "mp4", "gif"])
+    parser.add_argument("--fps", type=int, default=10)
+    args = parser.parse_args()
+
     # 1. 모델 파일 존재 확인
-    if not os.path.exists(MODEL_PATH + ".zip"):
-        print(f"[Error] Model file not found at: {MODEL_PATH}.zip")
+    if not os.path.exists(args.model + ".zip"):
+        print(f"[Error] Model file not found at: {args.model}.zip")
         print("Please run the training script first.")
         exit()
 
-    print(f"Loading Model from: {MODEL_PATH}")
+    print(f"Loading Model from: {args.model}")
     
     # 2. 모델 불러오기
-    loaded_model = PPO.load(MODEL_PATH)
+    loaded_model = PPO.load(args.model)
     
+    # 3-A. 녹화 모드: 창을 띄우지 않고 에피소드별로 프레임을 파일에 바로 씁니다.
+    if args.record:
+        test_env = gym.make("ForestFireMLP-v22")
+        policy = lambda obs: loaded_model.predict(obs, deterministic=True)[0]
+        for episode in range(1, args.episodes + 1):
+            name = f"episode_{episode:04d}" + ("" if args.video_format == "png" else f".{args.video_format}")
+            with FrameWriter(os.path.join(args.record, name), fps=args.fps) as writer:
+                total_reward, steps, terminated = record_episode(test_env, policy, writer)
+            status = "Success (All Clear!)" if terminated else "Fail (Timeout)"
+            print(f"[Episode {episode}] {status} | Total Reward: {total_reward:.2f} | Frames: {writer.count} -> {writer.path}")
+        test_env.close()
+        print("\nRecording Finished.")
+        exit()
+
     # 3. 테스트 환경 생성 (Render Mode: Human)
     test_env = gym.make("ForestFireMLP-v22", render_mode="human")
     
-    # 4. 테스트 루프 (5 에피소드)
-    for episode in range(1, 6):
+    # 4. 테스트 루프
+    for episode in range(1, args.episodes + 1):
         obs, _ = test_env.reset()
         done = False
         total_reward = 0
         
         # 현재 불 개수 확인 (내부 변수 접근)
-        fire_locs = [
-            pos for pos in test_env.unwrapped.trees 
-            if isinstance(test_env.unwrapped.grid.get(*pos), minigrid_forest_env.BurningTree)
-        ]
-        print(f"\n[Episode {episode}] Start! Initial Fires: {len(fire_locs)}")
+        fire_count = test_env.unwrapped._count_fires()
+        print(f"\n[Episode {episode}] Start! Initial Fires: {fire_count}")
         
         while not done:
             # 행동 예측 (Deterministic=True: 학습된 대로만 행동)
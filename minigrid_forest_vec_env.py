@@ -0,0 +1,435 @@
+import time
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from minigrid_forest_core import ForestFireSim, GRID_PLANES
+from minigrid_forest_layout import WALL, TANK, HEALTHY, BURNING, BURNT, EXTINGUISHED, NEIGHBORS_4, NEIGHBORS_8
+
+# 행동별 이동량: 0 Stay, 1 Up, 2 Right, 3 Down, 4 Left
+ACTION_DX = np.array([0, 0, 1, 0, -1], dtype=np.intp)
+ACTION_DY = np.array([0, -1, 0, 1, 0], dtype=np.intp)
+
+
+# --- Batched Environment ---
+class ForestFireVecEnv(VecEnv):
+    """
+    N개의 ForestFireEnv를 (N, size, size) uint8 배열 하나로 묶어 한 번에 진행하는 VecEnv입니다.
+    이동/진압/확산/전소/종료 판정/관측(10차원 벡터 또는 grid 평면)을 모두 배치 연산으로 처리하고,
+    종료된 환경은 배치 안에서 자동 리셋하며 Monitor와 같은 형식의 info["episode"]를 기록합니다.
+    동역학과 보상은 ForestFireEnv와 동일하며, 생성자 인자도 그대로 전달됩니다.
+
+    내부적으로는 상태 배열을 1차원(env * W * H + x * H + y)으로 펼쳐 이웃을 오프셋으로 조회하고,
+    환경별 화재 수와 구역별 건강한 나무 수는 셀 상태가 바뀔 때만 갱신합니다.
+    불타는 셀 목록도 점화/진압/전소/리셋 때만 고쳐, 확산과 관측 비용이 격자 크기가 아닌 화재 수에 비례합니다.
+    """
+
+    def __init__(self, num_envs, seed=None, **env_kwargs):
+        # 맵 구성과 파라미터는 단일 시뮬레이터(템플릿)에서 가져옵니다. MiniGrid 렌더러는 get_images에서만 만듭니다.
+        # event_skip / macro_return은 단일 환경 전용입니다. 조용히 무시하면 다른 알고리즘으로 학습하게 되므로 거부합니다.
+        env_kwargs.pop("render_mode", None)
+        if env_kwargs.get("event_skip"):
+            raise ValueError("ForestFireVecEnv samples every spread trial; event_skip needs single-env workers (envs_per_worker=1)")
+        if env_kwargs.get("macro_return"):
+            raise ValueError("ForestFireVecEnv steps forced returns one cell at a time; macro_return needs single-env workers (envs_per_worker=1)")
+        self.env_kwargs = env_kwargs
+        self.template = ForestFireSim(**env_kwargs)
+        self._renderer = None
+        t = self.template
+        self.size = t.size
+        self.max_steps = t.max_steps
+        self.max_water = t.max_water
+        self.tank_pos = t.tank_pos
+        self.battery_limit = t.battery_limit
+        self.initial_fire_count = t.initial_fire_count
+        self.base_spread_prob = t.base_spread_prob
+        self.burn_out_prob = t.burn_out_prob
+        self.r_ext_base = t.r_ext_base
+        self.r_risk_factor = t.r_risk_factor
+        self.r_per_tree = t.r_per_tree
+        self.p_step = t.p_step
+        self.p_wall = t.p_wall
+        self.p_spread = t.p_spread
+        self.p_burnt = t.p_burnt
+        self.p_failure = t.p_failure
+        self.obs_mode = t.obs_mode
+        self._obstacle_plane = t._obstacle_plane
+
+        # 정적 맵 구성은 공유 레이아웃에서 가져옵니다. (초기 상태, 나무 번호/구역 테이블)
+        layout = t.layout
+        w, h = t.width, t.height
+        self._cells = w * h
+        self._pristine = layout.initial_state
+        self.trees = layout.tree_coords
+        self._tree_cell = layout.tree_cell
+        self._tree_id = layout.tree_id.reshape(-1)
+        self._cell_zone = np.zeros(self._cells, dtype=np.intp)
+        self._cell_zone[self._tree_cell] = layout.tree_zone
+        self._zone_total = layout.zone_total.astype(np.float64)
+        self._off4 = np.array([dx * h + dy for dx, dy in NEIGHBORS_4], dtype=np.intp)
+        self._off8 = np.array([dx * h + dy for dx, dy in NEIGHBORS_8], dtype=np.intp)
+
+        n = num_envs
+        self.state = np.zeros((n, w, h), dtype=np.uint8)
+        self._flat = self.state.reshape(-1)
+        self.agent_x = np.zeros(n, dtype=np.intp)
+        self.agent_y = np.zeros(n, dtype=np.intp)
+        self.current_water = np.zeros(n, dtype=np.int64)
+        self.steps_since_tank = np.zeros(n, dtype=np.int64)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.fire_count = np.zeros(n, dtype=np.int64)
+        self.zone_healthy = np.zeros((n, 3), dtype=np.int64)
+        self.episode_returns = np.zeros(n, dtype=np.float64)
+        self.episode_lengths = np.zeros(n, dtype=np.int64)
+        self._env_index = np.arange(n)
+        self._actions = np.zeros(n, dtype=np.intp)
+        # 불타는 셀의 펼친 인덱스 (오름차순 = 환경별로 모인 구간). 전체 격자를 훑지 않고 확산/관측에 씁니다.
+        self._burning = np.zeros(0, dtype=np.intp)
+        self._reset_mask = np.zeros(n, dtype=bool)
+
+        # [시나리오 뱅크] 환경 i는 scenario_offset + i번부터 scenario_stride(기본: 환경 수) 간격으로 읽습니다.
+        self.scenarios = t.scenarios
+        self.scenario_mode = t.scenario_mode
+        self.scenario_difficulty = None
+        self.scenario_index = np.full(n, -1, dtype=np.int64)
+        self._scenario_cursor = env_kwargs.get("scenario_offset", 0) + np.arange(n)
+        self.scenario_stride = env_kwargs.get("scenario_stride", n)
+        # 뱅크에 에피소드별 확률이 있을 때만 환경별 확률 배열을 씁니다. (없으면 공유 스칼라)
+        self._spread_probs = self._burn_out_probs = None
+        if self.scenarios is not None:
+            records = self.scenarios.records
+            if not np.isnan(records["spread_prob"]).all():
+                self._spread_probs = np.full(n, self.base_spread_prob)
+            if not np.isnan(records["burn_out_prob"]).all():
+                self._burn_out_probs = np.full(n, self.burn_out_prob)
+        self._seed_rngs(None if seed is None else [seed + i for i in range(n)])
+        self._t_start = time.time()
+        self.render_mode = None
+
+        if self.obs_mode == "grid":
+            observation_space = spaces.Box(low=0, high=t.grid_obs_high(), dtype=np.uint8)
+        else:
+            observation_space = spaces.Box(low=-1.0, high=2.0, shape=(t.OBS_DIM,), dtype=np.float32)
+        super().__init__(n, observation_space, spaces.Discrete(t.N_ACTIONS))
+
+    # --- 난수 ---
+    def _seed_rngs(self, seeds):
+        # 환경 i는 seeds[i]로 시드된 전용 Generator로 초기 화재를 뽑고(단일 환경과 같은 시드 규칙),
+        # 배치 전체의 점화/전소 시행은 시드 목록 전체로 시드된 Generator 하나에서 한 번에 뽑습니다.
+        n = len(self.state)
+        if seeds is None:
+            seq = np.random.SeedSequence()
+            self._rng = np.random.default_rng(seq)
+            self._env_rngs = [np.random.default_rng(s) for s in seq.spawn(n)]
+        else:
+            self._rng = np.random.default_rng(list(seeds))
+            self._env_rngs = [np.random.default_rng(s) for s in seeds]
+
+    # --- 리셋 ---
+    def _pick_scenario(self, i, options=None):
+        # 환경 i의 이번 에피소드 시나리오 번호 (-1이면 기존처럼 무작위 초기 화재)
+        choice = (options or {}).get("scenario", self.scenario_mode)
+        if choice is None:
+            return -1
+        if self.scenarios is None:
+            raise ValueError("Selecting a scenario requires scenario_bank")
+        if choice == "stream":
+            index = self._scenario_cursor[i] % len(self.scenarios)
+            self._scenario_cursor[i] += self.scenario_stride
+            return index
+        if choice == "random":
+            difficulty = (options or {}).get("difficulty", self.scenario_difficulty)
+            return self.scenarios.sample(self._env_rngs[i], difficulty)
+        return int(choice)
+
+    def _reset_envs(self, idx, options=None):
+        self.state[idx] = self._pristine
+        self.zone_healthy[idx] = self._zone_total.astype(np.int64)
+        self.fire_count[idx] = 0
+
+        n_trees = len(self._tree_cell)
+        k = self.initial_fire_count
+        rows = cells = np.zeros(0, dtype=np.intp)
+        if self.scenarios is not None:
+            # 시나리오를 쓰는 환경은 뱅크의 초기 화재(와 에피소드별 확률)를, 나머지는 자기 Generator로 k개를 뽑습니다.
+            fires = []
+            for i in idx.tolist():
+                scenario = self._pick_scenario(i, options[i] if options else None)
+                self.scenario_index[i] = scenario
+                if scenario >= 0:
+                    record = self.scenarios.records[scenario]
+                    fires.append(self.scenarios.fires(scenario))
+                    if self._spread_probs is not None:
+                        p = record["spread_prob"]
+                        self._spread_probs[i] = self.base_spread_prob if np.isnan(p) else p
+                    if self._burn_out_probs is not None:
+                        b = record["burn_out_prob"]
+                        self._burn_out_probs[i] = self.burn_out_prob if np.isnan(b) else b
+                else:
+                    fires.append(self._env_rngs[i].choice(n_trees, k, replace=False) if n_trees >= k else np.zeros(0, np.intp))
+                    if self._spread_probs is not None:
+                        self._spread_probs[i] = self.base_spread_prob
+                    if self._burn_out_probs is not None:
+                        self._burn_out_probs[i] = self.burn_out_prob
+            counts = np.array([f.size for f in fires])
+            fire = np.concatenate(fires).astype(np.intp)
+            rows = np.repeat(idx, counts)
+            cells = self._tree_cell[fire]
+            self._flat[rows * self._cells + cells] = BURNING
+            np.subtract.at(self.zone_healthy, (rows, self._cell_zone[cells]), 1)
+            self.fire_count[idx] = counts
+        elif n_trees >= k:
+            # 환경마다 자기 Generator로 서로 다른 나무 k개를 비복원 추출
+            fire = np.concatenate([self._env_rngs[i].choice(n_trees, k, replace=False) for i in idx])
+            rows = np.repeat(idx, k)
+            cells = self._tree_cell[fire]
+            self._flat[rows * self._cells + cells] = BURNING
+            np.subtract.at(self.zone_healthy, (rows, self._cell_zone[cells]), 1)
+            self.fire_count[idx] = k
+
+        # 리셋한 환경의 이전 화재를 목록에서 빼고 새 초기 화재를 넣습니다.
+        self._reset_mask[idx] = True
+        kept = self._burning[~self._reset_mask[self._burning // self._cells]]
+        self._reset_mask[idx] = False
+        self._burning = np.sort(np.concatenate((kept, rows * self._cells + cells)))
+
+        self.agent_x[idx] = self.tank_pos[0]
+        self.agent_y[idx] = self.tank_pos[1]
+        self.current_water[idx] = self.max_water
+        self.steps_since_tank[idx] = 0
+        self.step_count[idx] = 0
+        self.episode_returns[idx] = 0.0
+        self.episode_lengths[idx] = 0
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self._seed_rngs(self._seeds)
+        self._reset_seeds()
+        options = self._options
+        self._reset_options()
+        self._reset_envs(self._env_index, options)
+        self.reset_infos = [{} if s < 0 else {"scenario": int(s)} for s in self.scenario_index.tolist()]
+        return self._observe()
+
+    # --- 관측 ---
+    def observe_grid(self, out=None):
+        """
+        배치 전체의 grid 관측 (N, C, W, H)을 만듭니다. out을 주면 미리 할당한 그 버퍼에 바로 씁니다.
+        평면마다 배치 전체에 ufunc 한 번(out= 지정)으로 채우고, 에이전트 평면만 환경당 한 칸을 씁니다.
+        """
+        if out is None:
+            out = np.empty((self.num_envs, len(GRID_PLANES)) + self.state.shape[1:], dtype=np.uint8)
+        planes = out.view(np.bool_)
+        np.equal(self.state, HEALTHY, out=planes[:, 0])
+        np.equal(self.state, BURNING, out=planes[:, 1])
+        np.greater_equal(self.state, BURNT, out=planes[:, 2])  # BURNT, EXTINGUISHED (가장 큰 두 상태 값)
+        planes[:, 3] = self._obstacle_plane
+        out[:, 4] = 0
+        out[self._env_index, 4, self.agent_x, self.agent_y] = 1
+        out[:, 5] = self.current_water[:, None, None]
+        battery = np.maximum(self.battery_limit - self.steps_since_tank, 0) * 255 // self.battery_limit
+        out[:, 6] = battery[:, None, None]
+        return out
+
+    def _observe(self):
+        if self.obs_mode == "grid":
+            return self.observe_grid()
+        n = self.num_envs
+        h = self.state.shape[2]
+        ax, ay = self.agent_x, self.agent_y
+        obs = np.zeros((n, 10), dtype=np.float32)
+        obs[:, 0] = ax / self.size
+        obs[:, 1] = ay / self.size
+        obs[:, 2] = self.current_water / self.max_water
+
+        g = self._burning
+        if g.size:
+            env, cell = np.divmod(g, self._cells)
+            fx, fy = np.divmod(cell, h)
+            tree = self._tree_id[cell]
+            n_trees = len(self._tree_cell)
+            # g는 env 순으로 정렬되어 있으므로 환경별 구간에서 (값, 나무 순서) 키의 최소/최대를 구합니다.
+            # 동점이면 self.trees에서 앞선 나무가 선택됩니다.
+            rows, starts = np.unique(env, return_index=True)
+
+            dist = np.abs(fx - ax[env]) + np.abs(fy - ay[env])
+            key = np.minimum.reduceat(dist * n_trees + tree, starts)
+            nearest = self._tree_cell[key % n_trees]
+            obs[rows, 3] = (nearest // h - ax[rows]) / self.size
+            obs[rows, 4] = (nearest % h - ay[rows]) / self.size
+
+            risk = np.zeros(g.size, dtype=np.intp)
+            for off in self._off8:
+                risk += self._flat[g + off] == HEALTHY
+            key = np.maximum.reduceat(risk * n_trees + (n_trees - 1 - tree), starts)
+            highest = self._tree_cell[n_trees - 1 - key % n_trees]
+            obs[rows, 5] = (highest // h - ax[rows]) / self.size
+            obs[rows, 6] = (highest % h - ay[rows]) / self.size
+
+        obs[:, 7:10] = np.where(self._zone_total > 0, self.zone_healthy / np.maximum(self._zone_total, 1), 1.0)
+        return obs
+
+    # --- 진행 ---
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.intp).reshape(self.num_envs)
+
+    def _spread_fire_logic(self):
+        penalty = np.zeros(self.num_envs, dtype=np.float64)
+        g = self._burning
+        g = g[self._flat[g] == BURNING]  # 이번 스텝에 진압된 셀 제외
+        self._burning = g
+        if g.size == 0:
+            return penalty
+
+        # 화재의 4-이웃 중 건강한 나무를 모아 셀별 인접 화재 수(k)를 세고, 1-(1-p)^k 확률로 점화
+        nb = (g[:, None] + self._off4).ravel()
+        nb = nb[self._flat[nb] == HEALTHY]
+        cand, exposure = np.unique(nb, return_counts=True)
+        spread_prob = self.base_spread_prob if self._spread_probs is None else self._spread_probs[cand // self._cells]
+        burn_out_prob = self.burn_out_prob if self._burn_out_probs is None else self._burn_out_probs[g // self._cells]
+        ignite_prob = 1.0 - (1.0 - spread_prob) ** exposure
+        draws = self._rng.random(cand.size + g.size)
+        ignited = cand[draws[:cand.size] < ignite_prob]
+        burnt = g[draws[cand.size:] < burn_out_prob]
+
+        self._flat[ignited] = BURNING
+        self._flat[burnt] = BURNT
+        # 목록 갱신: 전소된 셀을 빼고 새로 점화된 셀을 넣습니다. (화재 수에 비례하는 비용)
+        if ignited.size or burnt.size:
+            self._burning = np.sort(np.concatenate((g[self._flat[g] == BURNING], ignited)))
+
+        if ignited.size:
+            env, cell = np.divmod(ignited, self._cells)
+            np.subtract.at(self.zone_healthy, (env, self._cell_zone[cell]), 1)
+            spread = np.bincount(env, minlength=self.num_envs)
+            self.fire_count += spread
+            penalty += spread * self.p_spread
+        if burnt.size:
+            burnt_env = np.bincount(burnt // self._cells, minlength=self.num_envs)
+            self.fire_count -= burnt_env
+            penalty += burnt_env * self.p_burnt
+        return penalty
+
+    def step_wait(self):
+        n = self.num_envs
+        h = self.state.shape[2]
+        self.step_count += 1
+        self.steps_since_tank += 1
+        reward = np.full(n, self.p_step, dtype=np.float64)
+
+        # 강제 귀환: 물이 없거나 배터리(battery_limit 스텝)가 다 된 경우
+        action = self._actions.copy()
+        forced = (self.current_water == 0) | (self.steps_since_tank >= self.battery_limit)
+        if forced.any():
+            tx, ty = self.tank_pos
+            ax, ay = self.agent_x, self.agent_y
+            homing = np.select(
+                [ax < tx, ax > tx, ay < ty, ay > ty], [2, 4, 3, 1], default=0
+            )
+            action[forced] = homing[forced]
+
+        nx = self.agent_x + ACTION_DX[action]
+        ny = self.agent_y + ACTION_DY[action]
+        in_bounds = (nx >= 0) & (nx < self.size) & (ny >= 0) & (ny < self.size)
+        dest_g = self._env_index * self._cells + np.clip(nx, 0, self.size - 1) * h + np.clip(ny, 0, self.size - 1)
+        dest = self._flat[dest_g]
+        blocked = ~in_bounds | (dest == WALL)
+        reward[blocked] += self.p_wall
+        moved = ~blocked
+        self.agent_x[moved] = nx[moved]
+        self.agent_y[moved] = ny[moved]
+
+        # 접촉 진압 (불은 나무에만 붙고 나무는 외벽에 닿지 않으므로 이웃 조회에 경계 검사가 필요 없습니다.)
+        ext = np.flatnonzero(moved & (dest == BURNING) & (self.current_water > 0))
+        if ext.size:
+            g = dest_g[ext]
+            self.current_water[ext] -= 1
+            self._flat[g] = EXTINGUISHED
+            self.fire_count[ext] -= 1
+            risk = np.zeros(ext.size, dtype=np.float64)
+            for off in self._off8:
+                risk += self._flat[g + off] == HEALTHY
+            reward[ext] += self.r_ext_base + risk * self.r_risk_factor
+
+        at_tank = self._flat[self._env_index * self._cells + self.agent_x * h + self.agent_y] == TANK
+        self.current_water[at_tank] = self.max_water
+        self.steps_since_tank[at_tank] = 0
+
+        reward += self._spread_fire_logic()
+
+        healthy_count = self.zone_healthy.sum(axis=1)
+        failure = healthy_count == 0
+        success = ~failure & (self.fire_count == 0)
+        reward[failure] = self.p_failure
+        reward[success] += healthy_count[success] * self.r_per_tree
+        terminated = failure | success
+        truncated = self.step_count >= self.max_steps
+        dones = terminated | truncated
+
+        self.episode_returns += reward
+        self.episode_lengths += 1
+        obs = self._observe()
+
+        infos = [{} for _ in range(n)]
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            elapsed = round(time.time() - self._t_start, 6)
+            zone_ratio = np.where(self._zone_total > 0, self.zone_healthy / np.maximum(self._zone_total, 1), 1.0)
+            for i in done_idx.tolist():
+                infos[i]["episode"] = {
+                    "r": round(float(self.episode_returns[i]), 6),
+                    "l": int(self.episode_lengths[i]),
+                    "t": elapsed,
+                }
+                infos[i]["terminal_observation"] = obs[i]
+                infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+                infos[i]["outcome"] = "failure" if failure[i] else "success" if success[i] else "timeout"
+                infos[i]["healthy_trees"] = int(healthy_count[i])
+                infos[i]["zone_health"] = zone_ratio[i].tolist()
+                if self.scenario_index[i] >= 0:
+                    infos[i]["scenario"] = int(self.scenario_index[i])
+            self._reset_envs(done_idx)
+            obs = self._observe()
+
+        return obs, reward.astype(np.float32), dones, infos
+
+    # --- VecEnv 인터페이스 ---
+    def close(self):
+        if self._renderer is not None:
+            self._renderer.close()
+
+    def get_images(self):
+        # 렌더링용 단일 환경에 각 배치 상태를 복사해 MiniGrid 렌더러로 그립니다. (처음 호출할 때 MiniGrid를 불러옵니다)
+        if self._renderer is None:
+            from minigrid_forest_env import ForestFireEnv
+            self._renderer = ForestFireEnv(**self.env_kwargs)
+        frames = []
+        t = self._renderer
+        for i in range(self.num_envs):
+            t.state[:] = self.state[i]
+            t.agent_pos = (int(self.agent_x[i]), int(self.agent_y[i]))
+            t.agent_dir = 0
+            frames.append(t.get_frame())
+        return frames
+
+    def get_attr(self, attr_name, indices=None):
+        # 배치 전체가 하나의 객체이므로, 환경별 배열(길이 N)은 인덱싱하고 나머지는 공유 값을 돌려줍니다.
+        value = getattr(self, attr_name)
+        idx = list(self._get_indices(indices))
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in idx]
+        return [value for _ in idx]
+
+    def set_attr(self, attr_name, value, indices=None):
+        current = getattr(self, attr_name)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,89 @@
+import os
+import struct
+import zlib
+import numpy as np
+
+# ==========================================
+# [녹화] 화면 없이 프레임을 이미지 시퀀스 / 동영상으로 저장
+# ==========================================
+VIDEO_EXTS = (".mp4", ".gif", ".avi", ".mov", ".webm")
+
+
+def write_png(path, frame, compress_level=1):
+    """(H, W, 3) uint8 프레임을 PNG로 저장합니다. 표준 라이브러리(zlib)만 사용합니다."""
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    h, w = frame.shape[:2]
+    # 각 행 앞에 필터 타입 0(None) 바이트를 붙입니다.
+    raw = np.empty((h, w * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = frame.reshape(h, w * 3)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), compress_level)))
+        f.write(chunk(b"IEND", b""))
+
+
+class FrameWriter:
+    """
+    렌더링한 프레임을 바로 파일로 흘려 보냅니다.
+    - path가 동영상 확장자(.mp4, .gif 등)면 imageio로 인코딩합니다. (선택 의존성: pip install imageio imageio-ffmpeg)
+    - 그 외에는 디렉터리로 보고 frame_000000.png ... 순서로 PNG를 씁니다. (추가 의존성 없음)
+    """
+
+    def __init__(self, path, fps=10):
+        self.path = path
+        self.fps = fps
+        self.count = 0
+        self._writer = None
+        if path.lower().endswith(VIDEO_EXTS):
+            try:
+                import imageio
+            except ImportError as e:
+                raise ImportError("Video recording requires 'imageio' (and 'imageio-ffmpeg' for mp4).") from e
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+            self._writer = imageio.get_writer(path, fps=fps)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, frame):
+        if self._writer is not None:
+            self._writer.append_data(frame)
+        else:
+            write_png(os.path.join(self.path, f"frame_{self.count:06d}.png"), frame)
+        self.count += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_episode(env, policy, writer, tile_size=32):
+    """
+    policy(obs) -> action으로 에피소드 하나를 진행하며 매 스텝 프레임을 writer에 씁니다.
+    창을 띄우지 않고 캐시된 프레임(변경된 타일만 다시 그림)을 그대로 넘기므로 render_mode와 무관하게 동작합니다.
+    반환값: (총 보상, 스텝 수, terminated)
+    """
+    base = env.unwrapped
+    obs, _ = env.reset()
+    writer.write(base._render_frame(tile_size))
+    total_reward, steps = 0.0, 0
+    while True:
+        obs, reward, terminated, truncated, _ = env.step(policy(obs))
+        writer.write(base._render_frame(tile_size))
+        total_reward += reward
+        steps += 1
+        if terminated or truncated:
+            return total_reward, steps, terminated